@@ -7,16 +7,43 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from logic.conversational_agent import ConversationalAgent
-
 from http.server import BaseHTTPRequestHandler
 
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    def _dumps(data):
+        return json.dumps(data).encode()
+
+# Reject request bodies above 1 MiB before reading them
+MAX_BODY_BYTES = 1_048_576
+
+# Reused across warm invocations so the OpenAI client and its connections persist
+_AGENT = None
+
+def _get_agent():
+    global _AGENT
+    if _AGENT is None:
+        # Deferred so OPTIONS preflights on a cold start don't load openai
+        from logic.conversational_agent import ConversationalAgent
+        _AGENT = ConversationalAgent(model="gpt-4o-mini")
+    return _AGENT
+
 class handler(BaseHTTPRequestHandler):
+    # Buffer writes so the status line, headers and body go out together on flush
+    wbufsize = 64 * 1024
+
     def do_POST(self):
         try:
             content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data) if post_data else {}
+            if content_length > MAX_BODY_BYTES:
+                self._send_json({"error": "Payload too large"}, 413)
+                return
+            post_data = self.rfile.read(content_length) if content_length > 0 else b''
+            data = _loads(post_data) if post_data else {}
 
             session_id = data.get('session_id')
             message = data.get('message')
@@ -25,7 +52,7 @@ class handler(BaseHTTPRequestHandler):
             audience = data.get('audience', 'customer')
             action = data.get('action', 'chat')
 
-            agent = ConversationalAgent(model="gpt-4o-mini")
+            agent = _get_agent()
             
             if action == 'start' or not session_id:
                 result = agent.start_conversation(diagnostic_data, audience=audience)
@@ -38,11 +65,14 @@ class handler(BaseHTTPRequestHandler):
             self._send_json({"error": str(e)}, 500)
 
     def _send_json(self, data, status_code):
+        body = _dumps(data)
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
+        self.wfile.flush()
 
     def do_OPTIONS(self):
         self.send_response(200)
@@ -50,3 +80,8 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
+
+
+if __name__ == "__main__":
+    from logic.dev_server import run
+    run(handler)
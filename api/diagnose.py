@@ -1,3 +1,4 @@
+import copy
 import json
 import sys
 import os
@@ -12,16 +13,67 @@ from logic.dns_lookup import DNSLookup
 from logic.email_detector import EmailDetector
 from logic.decision_engine import DecisionEngine
 from logic.action_plan_builder import ActionPlanBuilder
-from logic.ai_translator import AITranslator
 
 from http.server import BaseHTTPRequestHandler
+from cachetools import TLRUCache
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    def _dumps(data):
+        return json.dumps(data).encode()
+
+# Reject request bodies above 1 MiB before reading them
+MAX_BODY_BYTES = 1_048_576
+
+DNS_CACHE_MAX_TTL = 300       # Upper bound for a cached snapshot (seconds)
+DNS_CACHE_NEGATIVE_TTL = 30   # Snapshots with lookup errors or no answers at all
+
+def _snapshot_ttl(snapshot):
+    """Cache lifetime for a snapshot: its shortest record TTL, capped."""
+    min_ttl = None
+    for records in snapshot.values():
+        if not isinstance(records, list):
+            continue
+        for record in records:
+            if record.get('error'):
+                return DNS_CACHE_NEGATIVE_TTL
+            ttl = record.get('ttl')
+            if ttl is not None and (min_ttl is None or ttl < min_ttl):
+                min_ttl = ttl
+    if min_ttl is None:
+        return DNS_CACHE_NEGATIVE_TTL
+    return min(min_ttl, DNS_CACHE_MAX_TTL)
+
+# DNS snapshots keyed by (domain, sections), shared across warm invocations
+_DNS_CACHE = TLRUCache(maxsize=2048, ttu=lambda _key, snapshot, now: now + _snapshot_ttl(snapshot))
+
+def _get_snapshot(domain, sections):
+    key = (domain.lower(), tuple(sorted(sections)))
+    snapshot = _DNS_CACHE.get(key)
+    if snapshot is None:
+        snapshot = DNSLookup().get_all_records(domain, filter_sections=sections)
+        if 'error' in snapshot:
+            # Invalid or blocked domains are rejected before any lookup happens
+            return snapshot
+        _DNS_CACHE[key] = snapshot
+    return copy.deepcopy(snapshot)
 
 class handler(BaseHTTPRequestHandler):
+    # Buffer writes so the status line, headers and body go out together on flush
+    wbufsize = 64 * 1024
+
     def do_POST(self):
         try:
             content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data) if post_data else {}
+            if content_length > MAX_BODY_BYTES:
+                self._send_json({"error": "Payload too large"}, 413)
+                return
+            post_data = self.rfile.read(content_length) if content_length > 0 else b''
+            data = _loads(post_data) if post_data else {}
 
             domain = data.get('domain')
             platform = data.get('platform', 'attractwell')
@@ -37,20 +89,11 @@ class handler(BaseHTTPRequestHandler):
             config = ConfigLoader()
 
             # 2. DNS Lookup
-            dns_tool = DNSLookup()
-            snapshot = dns_tool.get_all_records(domain, filter_sections=sections)
+            snapshot = _get_snapshot(domain, sections)
 
             # 3. Email Detection
             email_tool = EmailDetector(config.get_email_rules())
-            mx_records = snapshot.get('MX', [])
-            txt_records = snapshot.get('TXT', [])
-            
-            email_state = email_tool.detect_provider(mx_records)
-            email_state.update(email_tool.analyze_txt_records(txt_records))
-            email_state.update(email_tool.analyze_dns_snapshot(snapshot))
-            
-            dkim_records = snapshot.get('DKIM', [])
-            email_state.update(email_tool.analyze_dkim(dkim_records))
+            email_state = email_tool.analyze_email(snapshot)
 
             # 4. Decision Engine
             decision_engine = DecisionEngine(config)
@@ -72,8 +115,13 @@ class handler(BaseHTTPRequestHandler):
 
             # 6. AI Translation
             use_ai = data.get('use_ai', True)
+            if use_ai and data.get('stream'):
+                self._send_sse_translation(final_plan, ai_audience)
+                return
             if use_ai:
                 try:
+                    # Imported on demand so use_ai=False requests never load openai
+                    from logic.ai_translator import AITranslator
                     translator = AITranslator()
                     if ai_audience == 'both':
                         ai_insights = translator.translate_both(final_plan)
@@ -91,11 +139,47 @@ class handler(BaseHTTPRequestHandler):
             self._send_json({"error": str(e)}, 500)
 
     def _send_json(self, data, status_code):
+        body = _dumps(data)
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
+        self.wfile.flush()
+
+    def _send_sse_translation(self, plan, audience):
+        """Stream the plan followed by AI translation tokens as Server-Sent Events."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        self._send_event(plan, event='plan')
+        try:
+            from logic.ai_translator import AITranslator
+            translator = AITranslator()
+            if audience == 'both':
+                for stream_audience, token in translator.stream_both(plan):
+                    if isinstance(token, Exception):
+                        self._send_event({"error": str(token)}, event=stream_audience)
+                    else:
+                        self._send_event({"token": token}, event=stream_audience)
+            else:
+                for token in translator.stream_diagnostic(plan, audience=audience):
+                    self._send_event({"token": token})
+        except Exception as ai_error:
+            self._send_event({"error": str(ai_error)})
+        self._send_event({"done": True})
+
+    def _send_event(self, data, event=None):
+        payload = b"data: " + _dumps(data) + b"\n\n"
+        if event:
+            payload = f"event: {event}\n".encode() + payload
+        self.wfile.write(payload)
+        self.wfile.flush()
 
     def do_OPTIONS(self):
         self.send_response(200)
@@ -103,3 +187,8 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
+
+
+if __name__ == "__main__":
+    from logic.dev_server import run
+    run(handler)
@@ -1,51 +1,172 @@
+from collections import namedtuple
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+import tldextract
+
+# Bundled public suffix list only: no network fetch or disk cache on cold start
+_TLD_EXTRACT = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+# A snapshot record with its host and value pre-normalized for matching.
+# `value` keeps its case for display; the *_norm fields are stripped of the
+# trailing dot and lowercased.
+_NormRecord = namedtuple('_NormRecord', 'host host_norm value value_norm')
+
+
+def _normalize_snapshot(
+    dns_snapshot: Dict[str, Any], value_norms: Optional[Dict[str, List[str]]] = None
+) -> Dict[str, List[_NormRecord]]:
+    """Normalize every record list in the snapshot once per plan.
+
+    value_norms, when given, holds already-normalized values parallel to each
+    record list (the decision engine's snapshot index); lists that still line
+    up with their records are reused rather than lowercased again.
+    """
+    normalized = {}
+    for key, records in dns_snapshot.items():
+        if not isinstance(records, list):
+            continue  # e.g. WHOIS
+        rows = []
+        norms = value_norms.get(key) if value_norms else None
+        if norms is not None and len(norms) == len(records):
+            for r, value_norm in zip(records, norms):
+                host = r.get('host', '')
+                rows.append(_NormRecord(host, host.rstrip('.').lower(),
+                                        r.get('value', '').rstrip('.'), value_norm))
+        else:
+            for r in records:
+                host = r.get('host', '')
+                value = r.get('value', '').rstrip('.')
+                rows.append(_NormRecord(host, host.rstrip('.').lower(), value, value.lower()))
+        normalized[key] = rows
+    return normalized
+
+
+@dataclass(slots=True)
+class ComparisonEntry:
+    """One row of the current-vs-target comparison table."""
+    label: str
+    current: str
+    target: str
+    status: str
+    is_required: bool = False
+    # Only set on rows that carry them (nameservers / AAAA)
+    is_recommended: Optional[bool] = None
+    notes: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plan JSON form; unset optional fields are left out."""
+        row = {
+            "label": self.label,
+            "current": self.current,
+            "target": self.target,
+            "status": self.status,
+            "is_required": self.is_required,
+        }
+        if self.is_recommended is not None:
+            row["is_recommended"] = self.is_recommended
+        if self.notes is not None:
+            row["notes"] = self.notes
+        return row
+
+
+def _fmt_mx(record: Dict[str, Any]) -> str:
+    """Display form of an MX record: '<host> (prio <n>)'."""
+    return f"{record.get('value')} (prio {record.get('priority', '?')})"
+
+
+# Record types covered by each queried section (matching dns_lookup.py)
+_SECTION_TO_TYPES = {
+    'web': frozenset(['A', 'AAAA', 'CNAME', 'NS']),  # AAAA for IPv6 detection
+    'email': frozenset(['MX', 'TXT', 'DMARC', 'DKIM']),
+    'SPF': frozenset(['TXT']),
+}
+
+
+def _queried_types(queried_sections: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """Record types the user asked about, or None when every type counts as queried."""
+    if not queried_sections or 'all' in queried_sections:
+        return None
+    # A section may also name a record type directly
+    return frozenset(queried_sections).union(
+        *(_SECTION_TO_TYPES.get(section, ()) for section in queried_sections)
+    )
+
+
+# Snapshot keys whose records must sit on the queried domain (or '@') to match
+_HOST_SCOPED_KEYS = frozenset(['A', 'CNAME', 'MX', 'TXT', 'DMARC', 'NS'])
+
+
+def _match_index(normalized: Dict[str, List[_NormRecord]], query_host: str) -> Dict[str, FrozenSet[str]]:
+    """Map each snapshot key to the set of normalized values a required record can match."""
+    index = {}
+    for key, rows in normalized.items():
+        if key in _HOST_SCOPED_KEYS:
+            # Accept full domain or '@' for root records
+            index[key] = frozenset(r.value_norm for r in rows
+                                   if r.host_norm == query_host or r.host_norm == '@')
+        else:
+            index[key] = frozenset(r.value_norm for r in rows)
+    return index
+
+
 class ActionPlanBuilder:
     def __init__(self, config_loader):
         self.config = config_loader
 
 
-    def _is_record_match(self, dns_snapshot, rec_type, host, target_value, domain):
-        """Checks if the required record is already present in the DNS snapshot."""
+    def _is_record_match(
+        self, index: Dict[str, FrozenSet[str]], rec_type: str, host: Optional[str], target_value: str
+    ) -> bool:
+        """Checks if the required record is already present in the DNS snapshot's match index."""
         # Determine the key to look for in dns_snapshot
         lookup_key = rec_type
         if host == "www":
             lookup_key = "WWW_CNAME" if rec_type == "CNAME" else "WWW_A"
         
-        records = dns_snapshot.get(lookup_key, [])
-        target = target_value.rstrip('.').lower()
-        
-        for r in records:
-            # For non-specific keys (A, CNAME), check that the host matches the full domain
-            if lookup_key in ['A', 'CNAME', 'MX', 'TXT', 'DMARC', 'NS']:
-                r_host = r.get('host', '').rstrip('.').lower()
-                query_host = domain.rstrip('.').lower()
-                # Accept full domain or '@' for root records
-                if r_host != query_host and r_host != '@':
-                    continue
-                    
-            current_val = r.get('value', '').rstrip('.').lower()
-            if current_val == target:
-                return True
-        return False
+        # Platform values are normalized at config load; callers normalize anything else
+        return target_value in index.get(lookup_key, ())
 
-    def _build_comparison(self, decision, dns_snapshot, platform_rules, option_key):
+    def _build_comparison(
+        self,
+        decision: Dict[str, Any],
+        dns_snapshot: Dict[str, Any],
+        platform_rules: Dict[str, Any],
+        option_key: Optional[str],
+        normalized: Dict[str, List[_NormRecord]],
+        index: Dict[str, FrozenSet[str]],
+        ns_state: Dict[str, Any],
+    ) -> List[ComparisonEntry]:
         comparison = []
         is_sub = decision['is_subdomain']
         domain = decision['domain']
+        domain_norm = domain.rstrip('.').lower()
+
+        # Pull everything the table needs out of the snapshot in one pass
+        mx_recs = None
+        current_aaaa = []
+        www_aaaa = []
+        for key, recs in dns_snapshot.items():
+            if key == 'MX':
+                mx_recs = recs
+            elif key == 'AAAA':
+                current_aaaa = [r for r in recs if not r.get('error')]
+            elif key == 'WWW_AAAA':
+                www_aaaa = [r for r in recs if not r.get('error')]
         
         # 1. Nameservers (Always show if NS or WHOIS present)
-        current_ns = dns_snapshot.get('NS', [])
-        current_ns_vals = [r.get('value', '').rstrip('.').lower() for r in current_ns]
-        whois_ns = dns_snapshot.get('WHOIS', {}).get('name_servers', [])
-        all_current_ns = list(set(current_ns_vals + [ns.rstrip('.').lower() for ns in whois_ns]))
+        all_current_ns = set(ns_state['current_norm'])
+        all_current_ns.update(ns_state['whois_norm'])
         
-        target_ns = [ns.rstrip('.').lower() for ns in platform_rules.get('nameservers', [])]
+        target_ns = platform_rules.get('nameservers', [])
+        target_ns_set = ns_state['target_norm']
         
         ns_status = "missing"
         effective_target = ", ".join(target_ns)
         
         if option_key == 'option_1':
-            ns_status = "matched" if all(ns in all_current_ns for ns in target_ns) else "different"
-        elif all(ns in all_current_ns for ns in target_ns):
+            ns_status = "matched" if target_ns_set <= all_current_ns else "different"
+        elif target_ns_set <= all_current_ns:
             ns_status = "matched"
         else:
             ns_status = "external"
@@ -53,33 +174,31 @@ class ActionPlanBuilder:
             # It's preserving them.
             effective_target = "Preserve existing (Managed at Registrar)"
 
-        comparison.append({
-            "label": "Nameservers",
-            "current": ", ".join(all_current_ns) if all_current_ns else "None detected",
-            "target": effective_target,
-            "status": ns_status,
-            "is_required": False,
-            "is_recommended": (option_key == 'option_1')
-        })
+        comparison.append(ComparisonEntry(
+            label="Nameservers",
+            current=", ".join(all_current_ns) if all_current_ns else "None detected",
+            target=effective_target,
+            status=ns_status,
+            is_required=False,
+            is_recommended=(option_key == 'option_1')
+        ))
 
         # 1b. Check for Rogue AAAA (IPv6) records
         # Platforms like AW/GO are IPv4 only - AAAA records can block SSL generation
-        current_aaaa = [r for r in dns_snapshot.get('AAAA', []) if not r.get('error')]
-        www_aaaa = [r for r in dns_snapshot.get('WWW_AAAA', []) if not r.get('error')]
         all_aaaa = current_aaaa + www_aaaa
         
         if all_aaaa:
             aaaa_values = ", ".join([r.get('value', 'unknown') for r in all_aaaa])
             
             # Add to visual comparison
-            comparison.append({
-                "label": "AAAA (IPv6) Records",
-                "current": aaaa_values,
-                "target": "None (Delete these)",
-                "status": "conflict",
-                "is_required": True,
-                "notes": "IPv6 records often block SSL generation on this platform and must be removed."
-            })
+            comparison.append(ComparisonEntry(
+                label="AAAA (IPv6) Records",
+                current=aaaa_values,
+                target="None (Delete these)",
+                status="conflict",
+                is_required=True,
+                notes="IPv6 records often block SSL generation on this platform and must be removed."
+            ))
             
             # Inject into main conflicts list
             ipv6_conflict = {
@@ -93,10 +212,10 @@ class ActionPlanBuilder:
             # Avoid duplicates
             existing_aaaa_conflict = any(
                 c.get('type') == 'extra_record' and 'AAAA' in c.get('message', '') 
-                for c in decision.get('conflicts', [])
+                for c in decision.conflicts
             )
             if not existing_aaaa_conflict:
-                decision.setdefault('conflicts', []).append(ipv6_conflict)
+                decision.conflicts.append(ipv6_conflict)
 
         # 2. Main Connection Records
         if is_sub:
@@ -104,20 +223,20 @@ class ActionPlanBuilder:
             target = sub_config.get('target')
             
             # Use full domain for matching subdomain records
-            exists = self._is_record_match(dns_snapshot, "CNAME", None, target, domain)
-            current_cnames = [r.get('value', '').rstrip('.') for r in dns_snapshot.get('CNAME', []) 
-                             if r.get('host', '').rstrip('.').lower() == domain.rstrip('.').lower()
-                             or r.get('host', '') == domain.split('.')[0]]
+            exists = self._is_record_match(index, "CNAME", None, target)
+            first_label = domain.split('.')[0]
+            current_cnames = [r.value for r in normalized.get('CNAME', ())
+                             if r.host_norm == domain_norm or r.host == first_label]
             
             status = "matched" if exists else ("conflict" if current_cnames else "missing")
             
-            comparison.append({
-                "label": f"CNAME ({domain})",
-                "current": ", ".join(current_cnames) if current_cnames else "None detected",
-                "target": target,
-                "status": status,
-                "is_required": True
-            })
+            comparison.append(ComparisonEntry(
+                label=f"CNAME ({domain})",
+                current=", ".join(current_cnames) if current_cnames else "None detected",
+                target=target,
+                status=status,
+                is_required=True
+            ))
         else:
             root_opts = platform_rules.get('root_domain', {})
             opt_2_config = root_opts.get('option_2', {})
@@ -131,50 +250,50 @@ class ActionPlanBuilder:
                 
                 if lookup_key in dns_snapshot or rec['type'] in dns_snapshot:
                     val = rec['value']
+                    match_val = val
                     if val == "{root_domain}":
                         val = domain
+                        match_val = domain_norm
                     
-                    exists = self._is_record_match(dns_snapshot, rec['type'], rec['host'], val, domain)
+                    exists = self._is_record_match(index, rec['type'], rec['host'], match_val)
                     
                     # Get values for display
                     if lookup_key in ['WWW_CNAME', 'WWW_A']:
-                        current_records = dns_snapshot.get(lookup_key, [])
+                        current_records = normalized.get(lookup_key, ())
                     else:
-                        current_records = [r for r in dns_snapshot.get(rec['type'], []) 
-                                         if r.get('host', '').rstrip('.').lower() == domain.rstrip('.').lower()
-                                         or r.get('host', '') == '@']
+                        current_records = [r for r in normalized.get(rec['type'], ())
+                                         if r.host_norm == domain_norm or r.host == '@']
                         
-                    current_vals = [r.get('value', '').rstrip('.') for r in current_records]
+                    current_vals = [r.value for r in current_records]
                     status = "matched" if exists else ("conflict" if current_vals else "missing")
                     
-                    comparison.append({
-                        "label": f"{rec['type']} Record ({rec['host']})",
-                        "current": ", ".join(current_vals) if current_vals else "None detected",
-                        "target": val,
-                        "status": status,
-                        "is_required": True
-                    })
+                    comparison.append(ComparisonEntry(
+                        label=f"{rec['type']} Record ({rec['host']})",
+                        current=", ".join(current_vals) if current_vals else "None detected",
+                        target=val,
+                        status=status,
+                        is_required=True
+                    ))
 
         # 3. Email Records
         if 'MX' in dns_snapshot:
-            mx_recs = dns_snapshot.get('MX', [])
-            comparison.append({
-                "label": "MX Records",
-                "current": ", ".join([f"{r.get('value')} (prio {r.get('priority', '?')})" for r in mx_recs]) if mx_recs else "None detected",
-                "target": "Preserve existing",
-                "status": "matched" if mx_recs else "info",
-                "is_required": False
-            })
+            comparison.append(ComparisonEntry(
+                label="MX Records",
+                current=", ".join([_fmt_mx(r) for r in mx_recs]) if mx_recs else "None detected",
+                target="Preserve existing",
+                status="matched" if mx_recs else "info",
+                is_required=False
+            ))
 
         if 'TXT' in dns_snapshot:
             spf = decision.get('email_state', {}).get('spf_record')
-            comparison.append({
-                "label": "SPF Record",
-                "current": spf if spf else "None detected",
-                "target": "Preserve existing",
-                "status": "matched" if spf else "info",
-                "is_required": False
-            })
+            comparison.append(ComparisonEntry(
+                label="SPF Record",
+                current=spf if spf else "None detected",
+                target="Preserve existing",
+                status="matched" if spf else "info",
+                is_required=False
+            ))
         
         # 4. Diagnostics
         if 'DMARC' in dns_snapshot:
@@ -184,47 +303,32 @@ class ActionPlanBuilder:
             if dmarc and "p=none" in dmarc.lower():
                 status = "info"
             
-            comparison.append({
-                "label": "DMARC Record",
-                "current": dmarc if dmarc else "None detected",
-                "target": "p=quarantine (Recommended)",
-                "status": status,
-                "is_required": False
-            })
+            comparison.append(ComparisonEntry(
+                label="DMARC Record",
+                current=dmarc if dmarc else "None detected",
+                target="p=quarantine (Recommended)",
+                status=status,
+                is_required=False
+            ))
 
         if 'DKIM' in dns_snapshot:
             dkim_found = decision.get('email_state', {}).get('dkim_detected', False)
             dkim_val = decision.get('email_state', {}).get('dkim_record')
-            comparison.append({
-                "label": "DKIM Records",
-                "current": (dkim_val[:50] + "...") if dkim_val else ("Detected" if dkim_found else "None detected"),
-                "target": "Add if available",
-                "status": "matched" if dkim_found else "info",
-                "is_required": False
-            })
+            comparison.append(ComparisonEntry(
+                label="DKIM Records",
+                current=(dkim_val[:50] + "...") if dkim_val else ("Detected" if dkim_found else "None detected"),
+                target="Add if available",
+                status="matched" if dkim_found else "info",
+                is_required=False
+            ))
         
         return comparison
 
-    def _was_record_queried(self, rec_type, host, queried_sections):
-        if not queried_sections or 'all' in queried_sections:
-            return True
-        
-        # Map sections to record types (matching dns_lookup.py)
-        mapping = {
-            'web': ['A', 'AAAA', 'CNAME', 'NS'],  # AAAA for IPv6 detection
-            'email': ['MX', 'TXT', 'DMARC', 'DKIM'],
-            'SPF': ['TXT']
-        }
-        
-        for section in queried_sections:
-            if section == rec_type:
-                return True
-            if section in mapping and rec_type in mapping[section]:
-                return True
-        return False
-
-    def build_plan(self, decision, dns_snapshot, email_state):
+    def build_plan(
+        self, decision: Dict[str, Any], dns_snapshot: Dict[str, Any], email_state: Dict[str, Any]
+    ) -> Dict[str, Any]:
         queried_sections = decision.get('intent', {}).get('queried_sections')
+        queried_types = _queried_types(queried_sections)
         domain = decision['domain']
         
         plan = {
@@ -252,8 +356,29 @@ class ActionPlanBuilder:
              plan['warnings'].append("No valid connection option found for this scenario.")
              return plan
 
+        # Normalize record hosts/values once; every matcher below reuses them.
+        # The engine's index only applies to the snapshot it was built from.
+        snapshot_index = getattr(decision, 'snapshot_index', None)  # Decision objects only
+        value_norms = snapshot_index[1] if snapshot_index and snapshot_index[0] is dns_snapshot else None
+        normalized = _normalize_snapshot(dns_snapshot, value_norms)
+        domain_norm = domain.rstrip('.').lower()
+        index = _match_index(normalized, domain_norm)
+        # Normalized nameservers shared by the comparison table and the option_1
+        # check (snapshot order kept for the current/WHOIS values)
+        whois_ns = dns_snapshot.get('WHOIS', {}).get('name_servers', [])
+        ns_state = {
+            'current_norm': tuple(r.value_norm for r in normalized.get('NS', ())),
+            'whois_norm': tuple(ns.rstrip('.').lower() for ns in whois_ns),
+            'target_norm': self.config.get_platform_nameservers(decision['platform']),
+        }
+
         # Build comparison table data
-        plan['comparison'] = self._build_comparison(decision, dns_snapshot, platform_rules, option_key)
+        plan['comparison'] = [
+            entry.to_dict()
+            for entry in self._build_comparison(
+                decision, dns_snapshot, platform_rules, option_key, normalized, index, ns_state
+            )
+        ]
 
         actions = []
         suggestions = []
@@ -262,17 +387,15 @@ class ActionPlanBuilder:
             sub_config = platform_rules.get('subdomain', {})
             target = sub_config.get('target')
             
-            if not self._is_record_match(dns_snapshot, "CNAME", None, target, domain):
-                import tldextract
-                extracted = tldextract.extract(domain)
-                host_label = extracted.subdomain
+            if not self._is_record_match(index, "CNAME", None, target):
+                host_label = _TLD_EXTRACT(domain).subdomain
                 action = {
                     "action": "add_record",
                     "type": "CNAME",
                     "host": host_label,
                     "value": target
                 }
-                if self._was_record_queried('CNAME', host_label, queried_sections):
+                if queried_types is None or 'CNAME' in queried_types:
                     actions.append(action)
                 else:
                     suggestions.append(action)
@@ -280,18 +403,16 @@ class ActionPlanBuilder:
             if option_key == 'option_1':
                 # Nameserver change
                 ns_list = platform_rules.get('nameservers', [])
-                current_ns = dns_snapshot.get('NS', [])
-                current_ns_vals = [r.get('value', '').rstrip('.').lower() for r in current_ns]
-                needed_ns = [ns.rstrip('.').lower() for ns in ns_list]
+                needed_ns = ns_state['target_norm']
                 
-                is_match = all(ns in current_ns_vals for ns in needed_ns) if needed_ns else False
+                is_match = needed_ns.issubset(ns_state['current_norm']) if needed_ns else False
                 
                 if not is_match:
                     action = {
                         "action": "change_nameservers",
                         "values": ns_list
                     }
-                    if self._was_record_queried('NS', '@', queried_sections):
+                    if queried_types is None or 'NS' in queried_types:
                         actions.append(action)
                     else:
                         suggestions.append(action)
@@ -304,17 +425,19 @@ class ActionPlanBuilder:
                 records = opt_config.get('records', [])
                 for rec in records:
                     val = rec['value']
+                    match_val = val
                     if val == "{root_domain}":
                         val = domain
+                        match_val = domain_norm
                     
-                    if not self._is_record_match(dns_snapshot, rec['type'], rec['host'], val, domain):
+                    if not self._is_record_match(index, rec['type'], rec['host'], match_val):
                         action = {
                             "action": "add_record",
                             "type": rec['type'],
                             "host": rec['host'],
                             "value": val
                         }
-                        if self._was_record_queried(rec['type'], rec['host'], queried_sections):
+                        if queried_types is None or rec['type'] in queried_types:
                             actions.append(action)
                         else:
                             suggestions.append(action)
@@ -1,9 +1,95 @@
 import os
+import copy
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
+import queue
+import hashlib
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 
-load_dotenv()
+try:
+    import orjson
+
+    def _dumps_sorted(data):
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+    def _dumps_sorted(data):
+        return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+def _pool_settings():
+    """Keep-alive pool shared by every OpenAI client, so warm requests skip the TLS handshake."""
+    try:
+        import httpx
+    except ImportError:  # Newer openai releases depend on the httpx2 fork instead
+        import httpx2 as httpx
+    return {
+        "limits": httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        "timeout": 30,
+    }
+
+# OpenAI clients keyed by API key, shared so warm invocations reuse the HTTP pool
+_CLIENTS = {}
+
+def _get_client(api_key):
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        # openai (and pydantic behind it) is slow to import, so load it on first use
+        from openai import OpenAI, DefaultHttpxClient
+        client = OpenAI(api_key=api_key, http_client=DefaultHttpxClient(**_pool_settings()))
+        _CLIENTS[api_key] = client
+    return client
+
+# Async clients per event loop (then API key); httpx async pools cannot be
+# shared across loops, so each asyncio.run() gets its own
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+def _get_async_client(api_key):
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        client = AsyncOpenAI(api_key=api_key, http_client=DefaultAsyncHttpxClient(**_pool_settings()))
+        clients[api_key] = client
+    return client
+
+# Successful translations keyed by (model, audience, diagnostic payload) digest
+_AI_CACHE = TTLCache(maxsize=512, ttl=300)
+
+# DNS record values longer than this are cut before being sent to the model
+MAX_RECORD_VALUE_CHARS = 256
+TRUNCATED_MARKER = "...[truncated]"
+
+def _compact(value, truncate=False):
+    """Drop empty containers and duplicate list items, optionally shortening long strings."""
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            item = _compact(item, truncate)
+            if item == {} or item == []:
+                continue
+            compacted[key] = item
+        return compacted
+    if isinstance(value, list):
+        compacted = []
+        seen = set()
+        for item in value:
+            item = _compact(item, truncate)
+            if item == {} or item == []:
+                continue
+            marker = json.dumps(item, sort_keys=True, default=str)
+            if marker in seen:
+                continue
+            seen.add(marker)
+            compacted.append(item)
+        return compacted
+    if truncate and isinstance(value, str) and len(value) > MAX_RECORD_VALUE_CHARS:
+        return value[:MAX_RECORD_VALUE_CHARS] + TRUNCATED_MARKER
+    return value
 
 class AITranslator:
     """Phase 2: AI as a translator, not a decision-maker.
@@ -14,15 +100,23 @@ class AITranslator:
     
     def __init__(self, model="gpt-4o-mini"):
         self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            # Only read .env when the key isn't already in the environment
+            from dotenv import load_dotenv
+            load_dotenv()
+            self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables.")
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = _get_client(self.api_key)
         self.model = model
 
-    def _get_system_prompt(self, audience="customer"):
-        """Generate system prompt with strict guardrails based on audience."""
-        
-        base_guardrails = """
+    # Safety ceiling only; the response schemas bound the actual output
+    MAX_OUTPUT_TOKENS = 2000
+
+    # The prompts are static, so they are built once when the class is created.
+    # The shared guardrails come first so both audiences send an identical
+    # leading prefix, which the API can serve from its prompt cache.
+    _BASE_GUARDRAILS = """
 **CRITICAL GUARDRAILS - YOU MUST FOLLOW THESE STRICTLY**:
 1. **NEVER invent or suggest DNS records** that are not explicitly mentioned in the provided diagnostic data
 2. **ONLY translate existing data** - you are a translator, not a decision-maker
@@ -41,15 +135,15 @@ class AITranslator:
 4. **DO NOT recommend specific DNS values** unless they are already in `recommended_actions`
 5. **DO NOT diagnose issues** beyond what's in the `conflicts` and `warnings` arrays
 6. Stick to facts from the JSON only
-"""
-
-        if audience == "support":
-            return f"""
-You are a technical DNS analysis assistant for SUPPORT STAFF.
 
-{base_guardrails}
+**DIAGNOSTIC DATA FORMAT**:
+- Top-level keys: `domain`, `platform`, `is_subdomain`, `connection_option`, `is_completed`, `status_message`, `warnings`, `conflicts`, `recommended_actions`, `potential_issues`, `email_state`, `delegate_access`, `comparison`, `dns_snapshot`
+- Keys whose value would be an empty array or object are omitted - a missing `conflicts`, `warnings`, etc. means there are none
+- Duplicate records are listed once
+- Record values longer than 256 characters are cut and end with "...[truncated]"
+"""
 
-**Your Audience**: Internal support team members who understand DNS basics but need clear technical summaries.
+    _SUPPORT_INSTRUCTIONS = """**Your Audience**: Internal support team members who understand DNS basics but need clear technical summaries.
 
 **Your Task**: Translate the diagnostic JSON into a concise technical summary AND generate a client-ready email draft.
 IMPORTANT CONTEXT: 
@@ -78,16 +172,14 @@ Write a polite, professional email that support can send to the customer. Struct
 - "actions_required": Array of actions (from recommended_actions only, or empty array)
 - "notes": Array of important context for support staff
 - "client_email_draft": Ready-to-send email for the customer (use [Name] as placeholder)
-
-ONLY output valid JSON. No other text.
 """
-        else:  # customer
-            return f"""
-You are a helpful DNS assistant explaining domain connection status to CUSTOMERS.
 
-{base_guardrails}
+    _SUPPORT_PROMPT = f"""{_BASE_GUARDRAILS}
+You are a technical DNS analysis assistant for SUPPORT STAFF.
+
+{_SUPPORT_INSTRUCTIONS}"""
 
-**Your Audience**: Business owners who likely don't understand DNS. Be reassuring and clear.
+    _CUSTOMER_INSTRUCTIONS = """**Your Audience**: Business owners who likely don't understand DNS. Be reassuring and clear.
 
 **Your Task**: Translate the diagnostic JSON into plain English:
 - Explain what we found in simple terms.
@@ -108,23 +200,119 @@ You are a helpful DNS assistant explaining domain connection status to CUSTOMERS
 - "summary": Clear explanation of current status (2-4 sentences)
 - "what_this_means": Plain-English explanation of any issues or next steps
 - "next_steps": Array of simple action items or questions to guide them
-
-ONLY output valid JSON. No other text.
 """
 
-    def translate_diagnostic(self, diagnostic_json, audience="customer"):
-        """
-        Translates structured diagnostic JSON into human-readable explanations.
-        
-        Args:
-            diagnostic_json: The complete diagnostic result from the engine
-            audience: "customer" or "support" - determines tone and detail level
-            
-        Returns:
-            Dictionary with translated explanations appropriate for the audience
-        """
-        system_prompt = self._get_system_prompt(audience)
-        
+    _CUSTOMER_PROMPT = f"""{_BASE_GUARDRAILS}
+You are a helpful DNS assistant explaining domain connection status to CUSTOMERS.
+
+{_CUSTOMER_INSTRUCTIONS}"""
+
+    # translate_both() asks for both audiences in a single response
+    _BOTH_PROMPT = f"""{_BASE_GUARDRAILS}
+You are a DNS analysis assistant writing two translations of the same diagnostic in one response: one for SUPPORT STAFF and one for CUSTOMERS.
+
+Return a JSON object with the keys "support" and "customer". Each value follows the matching section below, including its own output format.
+
+=== "support": for SUPPORT STAFF ===
+{_SUPPORT_INSTRUCTIONS}
+=== "customer": for CUSTOMERS ===
+{_CUSTOMER_INSTRUCTIONS}"""
+
+    # Prebuilt system messages, shared by every request for the audience
+    _SYSTEM_MESSAGES = {
+        "support": {"role": "system", "content": _SUPPORT_PROMPT},
+        "customer": {"role": "system", "content": _CUSTOMER_PROMPT},
+        "both": {"role": "system", "content": _BOTH_PROMPT},
+    }
+
+    # Structured Outputs schemas matching the keys documented in the prompts
+    _SUPPORT_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "technical_summary": {"type": "string"},
+            "issues": {"type": "array", "items": {"type": "string"}},
+            "actions_required": {"type": "array", "items": {"type": "string"}},
+            "notes": {"type": "array", "items": {"type": "string"}},
+            "client_email_draft": {"type": "string"}
+        },
+        "required": ["technical_summary", "issues", "actions_required", "notes", "client_email_draft"],
+        "additionalProperties": False
+    }
+
+    _CUSTOMER_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "summary": {"type": "string"},
+            "what_this_means": {"type": "string"},
+            "next_steps": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["summary", "what_this_means", "next_steps"],
+        "additionalProperties": False
+    }
+
+    _RESPONSE_FORMATS = {
+        "support": {
+            "type": "json_schema",
+            "json_schema": {"name": "support_translation", "schema": _SUPPORT_SCHEMA, "strict": True}
+        },
+        "customer": {
+            "type": "json_schema",
+            "json_schema": {"name": "customer_translation", "schema": _CUSTOMER_SCHEMA, "strict": True}
+        },
+        "both": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "combined_translation",
+                "schema": {
+                    "type": "object",
+                    "properties": {"support": _SUPPORT_SCHEMA, "customer": _CUSTOMER_SCHEMA},
+                    "required": ["support", "customer"],
+                    "additionalProperties": False
+                },
+                "strict": True
+            }
+        }
+    }
+
+    # translate_many() wraps one translation per diagnostic in a "results" array
+    _BATCH_RESPONSE_FORMATS = {
+        audience: {
+            "type": "json_schema",
+            "json_schema": {
+                "name": f"{audience}_translation_batch",
+                "schema": {
+                    "type": "object",
+                    "properties": {"results": {"type": "array", "items": schema}},
+                    "required": ["results"],
+                    "additionalProperties": False
+                },
+                "strict": True
+            }
+        }
+        for audience, schema in (("support", _SUPPORT_SCHEMA), ("customer", _CUSTOMER_SCHEMA))
+    }
+
+    # Limits on how many diagnostics translate_many() packs into one request.
+    # Payload size is a rough input-token bound (~4 characters per token).
+    MAX_BATCH_ITEMS = 10
+    MAX_BATCH_PAYLOAD_CHARS = 48000
+
+    def _get_response_format(self, audience="customer"):
+        """Return the strict JSON schema response format for the audience."""
+        if audience in ("support", "both"):
+            return self._RESPONSE_FORMATS[audience]
+        return self._RESPONSE_FORMATS["customer"]
+
+    def _get_system_prompt(self, audience="customer"):
+        """Return the system prompt with strict guardrails for the audience."""
+        if audience == "support":
+            return self._SUPPORT_PROMPT
+        if audience == "both":
+            return self._BOTH_PROMPT
+        return self._CUSTOMER_PROMPT
+
+    def _serialize_diagnostic(self, diagnostic_json):
+        """Serialize the subset of the diagnostic that is sent to the model."""
         # Create a cleaned version of the JSON to send (with full DNS context for answering questions)
         clean_data = {
             "domain": diagnostic_json.get("domain"),
@@ -142,59 +330,309 @@ ONLY output valid JSON. No other text.
             "delegate_access": diagnostic_json.get("delegate_access", {}),
             "comparison": diagnostic_json.get("comparison", []),
             # Include dns_snapshot so AI can answer "What is my X record?" questions
-            "dns_snapshot": diagnostic_json.get("dns_snapshot", {})
+            "dns_snapshot": _compact(diagnostic_json.get("dns_snapshot", {}), truncate=True)
         }
+        clean_data = _compact(clean_data)
+        # Compact, key-sorted output keeps the prompt small and makes equal
+        # diagnostics serialize identically for the cache key
+        return _dumps_sorted(clean_data)
+
+    def _cache_key(self, payload, audience):
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.model, audience, payload):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.digest()
+
+    def _build_messages(self, payload, audience="customer"):
+        """Build the system + user messages for a serialized diagnostic payload."""
+        label = "support- and customer" if audience == "both" else audience
         
-        user_content = f"""Analyze this DNS diagnostic data and provide {audience}-facing explanation:
+        user_content = f"""Analyze this DNS diagnostic data and provide {label}-facing explanation:
+
+{payload}
+
+Remember: Only translate what's in the data. Do not invent records or suggest actions beyond what's in recommended_actions."""
 
-{json.dumps(clean_data, indent=2)}
+        system_message = self._SYSTEM_MESSAGES.get(audience, self._SYSTEM_MESSAGES["customer"])
+        return [system_message, {"role": "user", "content": user_content}]
+
+    def _build_batch_messages(self, payloads, audience="customer"):
+        """Build the system + user messages for several serialized diagnostic payloads."""
+        user_content = f"""Analyze each of the following DNS diagnostics and provide a {audience}-facing explanation for each one.
+Return them in the "results" array, in the same order as the diagnostics below.
+
+[{",".join(payloads)}]
 
 Remember: Only translate what's in the data. Do not invent records or suggest actions beyond what's in recommended_actions."""
 
+        return [self._SYSTEM_MESSAGES[audience], {"role": "user", "content": user_content}]
+
+    def translate_diagnostic(self, diagnostic_json, audience="customer"):
+        """
+        Translates structured diagnostic JSON into human-readable explanations.
+        
+        Args:
+            diagnostic_json: The complete diagnostic result from the engine
+            audience: "customer" or "support" - determines tone and detail level
+            
+        Returns:
+            Dictionary with translated explanations appropriate for the audience
+        """
+        payload = self._serialize_diagnostic(diagnostic_json)
+        cache_key = self._cache_key(payload, audience)
+        cached = _AI_CACHE.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        try:
+            response = self.client.chat.completions.create(**self._request_args(payload, audience))
+            return self._finish_translation(response, audience, cache_key)
+            
+        except Exception as e:
+            # Fail gracefully
+            return self._error_result(audience, e)
+
+    async def translate_diagnostic_async(self, diagnostic_json, audience="customer"):
+        """
+        Async variant of translate_diagnostic().
+        
+        Network-bound, so callers translating several diagnostics can
+        asyncio.gather() these calls and wait roughly one API round trip in
+        total. Shares the cache and error fallback of the sync method.
+        """
+        payload = self._serialize_diagnostic(diagnostic_json)
+        cache_key = self._cache_key(payload, audience)
+        cached = _AI_CACHE.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        try:
+            client = _get_async_client(self.api_key)
+            response = await client.chat.completions.create(**self._request_args(payload, audience))
+            return self._finish_translation(response, audience, cache_key)
+            
+        except Exception as e:
+            return self._error_result(audience, e)
+
+    def _request_args(self, payload, audience):
+        """Chat completion arguments for a single-audience translation."""
+        return {
+            "model": self.model,
+            "messages": self._build_messages(payload, audience),
+            "response_format": self._get_response_format(audience),
+            "temperature": 0.3,
+            "max_tokens": self.MAX_OUTPUT_TOKENS
+        }
+
+    def _finish_translation(self, response, audience, cache_key):
+        """Parse a single-audience response, tag it with metadata and cache it."""
+        ai_result = _loads(response.choices[0].message.content)
+        
+        # Add metadata about the translation
+        ai_result["_metadata"] = {
+            "audience": audience,
+            "model": self.model,
+            "guardrails_active": True
+        }
+        
+        _AI_CACHE[cache_key] = copy.deepcopy(ai_result)
+        return ai_result
+
+    def translate_many(self, diagnostics, audience="customer"):
+        """
+        Translate several diagnostics with as few API calls as possible.
+        
+        Cached translations are reused; the remaining diagnostics are packed into
+        requests of at most MAX_BATCH_ITEMS items and MAX_BATCH_PAYLOAD_CHARS of
+        payload, each answered with one JSON array. A failed batch yields error
+        results for its diagnostics only.
+        
+        Args:
+            diagnostics: List of diagnostic results from the engine
+            audience: "customer" or "support"
+            
+        Returns:
+            List of translations in the same order as diagnostics
+        """
+        audience = "support" if audience == "support" else "customer"
+        results = [None] * len(diagnostics)
+        pending = []  # (index, payload, cache_key)
+        for i, diagnostic_json in enumerate(diagnostics):
+            payload = self._serialize_diagnostic(diagnostic_json)
+            cache_key = self._cache_key(payload, audience)
+            cached = _AI_CACHE.get(cache_key)
+            if cached is not None:
+                results[i] = copy.deepcopy(cached)
+            else:
+                pending.append((i, payload, cache_key))
+
+        batch, batch_chars = [], 0
+        for item in pending:
+            if batch and (len(batch) >= self.MAX_BATCH_ITEMS
+                          or batch_chars + len(item[1]) > self.MAX_BATCH_PAYLOAD_CHARS):
+                self._translate_batch(batch, audience, results)
+                batch, batch_chars = [], 0
+            batch.append(item)
+            batch_chars += len(item[1])
+        if batch:
+            self._translate_batch(batch, audience, results)
+        return results
+
+    def _translate_batch(self, batch, audience, results):
+        """Translate one packed batch, writing each translation into results."""
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
-                response_format={"type": "json_object"},
+                messages=self._build_batch_messages([payload for _, payload, _ in batch], audience),
+                response_format=self._BATCH_RESPONSE_FORMATS[audience],
                 temperature=0.3,
-                max_tokens=1000
+                max_tokens=len(batch) * self.MAX_OUTPUT_TOKENS
             )
             
-            ai_result = json.loads(response.choices[0].message.content)
-            
-            # Add metadata about the translation
+            translations = _loads(response.choices[0].message.content)["results"]
+            if len(translations) != len(batch):
+                raise ValueError(f"expected {len(batch)} translations, got {len(translations)}")
+        except Exception as e:
+            for i, _, _ in batch:
+                results[i] = self._error_result(audience, e)
+            return
+
+        for (i, _, cache_key), ai_result in zip(batch, translations):
             ai_result["_metadata"] = {
                 "audience": audience,
                 "model": self.model,
                 "guardrails_active": True
             }
+            _AI_CACHE[cache_key] = copy.deepcopy(ai_result)
+            results[i] = ai_result
+
+    def _error_result(self, audience, e):
+        """Fallback translation returned when the API call fails."""
+        if audience == "support":
+            return {
+                "error": f"AI translation failed: {str(e)}",
+                "technical_summary": "Error generating AI analysis.",
+                "issues": [],
+                "actions_required": [],
+                "notes": ["AI translation unavailable - refer to raw diagnostic data"]
+            }
+        else:
+            return {
+                "error": f"AI translation failed: {str(e)}",
+                "summary": "We completed the diagnostic but couldn't generate a summary. Please review the technical details or contact support.",
+                "what_this_means": "The system is working, but the explanation service is temporarily unavailable.",
+                "next_steps": ["Contact support for help understanding these results"]
+            }
+
+    def stream_diagnostic(self, diagnostic_json, audience="customer"):
+        """
+        Stream a translation as it is generated.
+        
+        Yields the raw JSON text in content deltas so callers can forward tokens
+        before the full response is ready. The concatenated chunks form the same
+        JSON object that translate_diagnostic() would parse.
+        
+        Args:
+            diagnostic_json: The complete diagnostic result from the engine
+            audience: "customer" or "support" - determines tone and detail level
+            
+        Yields:
+            str: Content deltas from the model
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(self._serialize_diagnostic(diagnostic_json), audience),
+            response_format=self._get_response_format(audience),
+            temperature=0.3,
+            max_tokens=self.MAX_OUTPUT_TOKENS,
+            stream=True
+        )
+        
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    yield choice.delta.content
+                if choice.finish_reason is not None:
+                    break
+        finally:
+            # Release the connection as soon as the model has finished
+            stream.close()
+
+    def translate_both(self, diagnostic_json):
+        """
+        Generate both support and customer translations.
+        
+        A single request with a combined schema returns both audiences, so the
+        diagnostic payload is only sent (and prefilled) once.
+        """
+        payload = self._serialize_diagnostic(diagnostic_json)
+        cache_key = self._cache_key(payload, "both")
+        cached = _AI_CACHE.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(payload, "both"),
+                response_format=self._get_response_format("both"),
+                temperature=0.3,
+                # Room for two translations
+                max_tokens=2 * self.MAX_OUTPUT_TOKENS
+            )
+            
+            combined = _loads(response.choices[0].message.content)
+            results = {}
+            for audience in ("support", "customer"):
+                ai_result = combined[audience]
+                ai_result["_metadata"] = {
+                    "audience": audience,
+                    "model": self.model,
+                    "guardrails_active": True
+                }
+                results[audience] = ai_result
             
-            return ai_result
+            _AI_CACHE[cache_key] = copy.deepcopy(results)
+            return results
             
         except Exception as e:
-            # Fail gracefully
-            if audience == "support":
-                return {
-                    "error": f"AI translation failed: {str(e)}",
-                    "technical_summary": "Error generating AI analysis.",
-                    "issues": [],
-                    "actions_required": [],
-                    "notes": ["AI translation unavailable - refer to raw diagnostic data"]
-                }
-            else:
-                return {
-                    "error": f"AI translation failed: {str(e)}",
-                    "summary": "We completed the diagnostic but couldn't generate a summary. Please review the technical details or contact support.",
-                    "what_this_means": "The system is working, but the explanation service is temporarily unavailable.",
-                    "next_steps": ["Contact support for help understanding these results"]
-                }
+            return {
+                "support": self._error_result("support", e),
+                "customer": self._error_result("customer", e)
+            }
 
-    def translate_both(self, diagnostic_json):
-        """Generate both support and customer translations in one call."""
-        return {
-            "support": self.translate_diagnostic(diagnostic_json, audience="support"),
-            "customer": self.translate_diagnostic(diagnostic_json, audience="customer")
-        }
+    def stream_both(self, diagnostic_json):
+        """
+        Stream support and customer translations concurrently.
+        
+        Both requests are started at once so the customer stream begins while
+        the support stream is still generating. Deltas are yielded in arrival
+        order as (audience, delta) tuples. If one audience fails, its exception
+        is yielded in place of a delta and the other stream continues.
+        """
+        events = queue.Queue()
+
+        def pump(audience):
+            try:
+                for delta in self.stream_diagnostic(diagnostic_json, audience=audience):
+                    events.put((audience, delta))
+            except Exception as e:
+                events.put((audience, e))
+            finally:
+                events.put((audience, None))
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(pump, "support")
+            executor.submit(pump, "customer")
+            
+            remaining = 2
+            while remaining:
+                audience, delta = events.get()
+                if delta is None:
+                    remaining -= 1
+                    continue
+                yield audience, delta
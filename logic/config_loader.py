@@ -1,12 +1,170 @@
 import yaml
+import hashlib
 import os
+import pickle
+import sys
+
+try:
+    # libyaml-backed parser; much faster than the pure-Python SafeLoader
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Parsed rules keyed by resolved config path, shared across ConfigLoader
+# instances: path -> (st_mtime_ns, st_size, rules). An edited file no longer
+# matches its stat signature and is re-read on the next load.
+_CONFIG_CACHE = {}
+_CONFIG_CACHE_SIZE = 16
+# First existing location for each requested config path
+_RESOLVED_PATHS = {}
+# Accepted (lowercase) identifiers for each platform in the rules file
+_PLATFORM_ALIASES = {
+    'attractwell': ('attractwell', 'aw'),
+    'getoiling': ('getoiling', 'get oiling', 'go'),
+}
+
+# The rules pickle (<rules>.cache.pkl) is only written on purpose: by a build
+# step (python -m logic.config_loader [rules.yaml]) or with RULES_CACHE_WRITE=1.
+# Without one the loader just parses the yaml.
+_WRITE_RULES_CACHE = os.getenv("RULES_CACHE_WRITE", "0") == "1"
+# Cache files open with this marker, then the hex SHA-256 of the yaml they were
+# built from; pickles left by older loaders lack the marker and are ignored
+_CACHE_MAGIC = b"dns-diagnostic-rules-cache/2\n"
+
+# Yaml "when" condition keys -> intent dict keys
+_YAML_TO_INTENT = {
+    'external_dependencies': 'has_external_dependencies',
+}
+
+
+def _compile_when(conditions):
+    """Compile a rule's "when" mapping into a predicate over the intent dict.
+
+    Unmapped yaml keys read as None, as intent.get(None) always does.
+    """
+    checks = tuple((_YAML_TO_INTENT.get(k), v) for k, v in conditions.items())
+    if len(checks) == 1:
+        ((key, expected),) = checks
+        return lambda intent: intent.get(key) == expected
+    return lambda intent: all(intent.get(key) == expected for key, expected in checks)
+
+
+def _rules_cache_header(source):
+    return _CACHE_MAGIC + hashlib.sha256(source).hexdigest().encode('ascii')
+
+
+def _read_rules(path):
+    """Parse the YAML rules, reusing a pre-built pickle cache of identical contents."""
+    with open(path, 'rb') as f:
+        source = f.read()
+    header = _rules_cache_header(source)
+    cache_path = f"{path}.cache.pkl"
+    try:
+        with open(cache_path, 'rb') as f:
+            if f.read(len(header)) == header:
+                return pickle.load(f)
+    except Exception:
+        pass  # missing, unreadable or from an incompatible Python - reparse
+
+    rules = yaml.load(source, Loader=SafeLoader)
+    if _WRITE_RULES_CACHE:
+        try:
+            _write_rules_cache(cache_path, header, rules)
+        except OSError:
+            pass  # read-only filesystem: keep parsing on cold start
+    return rules
+
+
+def _write_rules_cache(cache_path, header, rules):
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        pickle.dump(rules, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_path)
+
+
+def build_rules_cache(config_path="domain_rules.yaml"):
+    """Write <rules>.cache.pkl for the rules file; returns the cache path.
+
+    Meant for a build step, so deployments load the pickle instead of parsing
+    the yaml on cold start.
+    """
+    path = ConfigLoader(config_path).config_path
+    with open(path, 'rb') as f:
+        source = f.read()
+    cache_path = f"{path}.cache.pkl"
+    _write_rules_cache(cache_path, _rules_cache_header(source), yaml.load(source, Loader=SafeLoader))
+    return cache_path
+
+
+def _normalize_rule_values(rules):
+    """Strip trailing dots from and lowercase the platform values matched against DNS.
+
+    Done once per parsed rules dict (flagged with '_normalized'), so the
+    engine and plan builder can compare these values without re-normalizing.
+    """
+    if rules.get('_normalized'):
+        return
+    for platform in rules.get('platforms', {}).values():
+        if platform.get('nameservers'):
+            platform['nameservers'] = [ns.rstrip('.').lower() for ns in platform['nameservers']]
+        subdomain = platform.get('subdomain') or {}
+        if isinstance(subdomain.get('target'), str):
+            subdomain['target'] = subdomain['target'].rstrip('.').lower()
+        for option in (platform.get('root_domain') or {}).values():
+            for rec in option.get('records', []):
+                if isinstance(rec.get('value'), str):
+                    rec['value'] = rec['value'].rstrip('.').lower()
+    rules['_normalized'] = True
+
 
 class ConfigLoader:
     def __init__(self, config_path="domain_rules.yaml"):
         self.config_path = config_path
         self.rules = self._load_config()
+        self._ipv6_unsupported = frozenset(
+            p.lower() for p in self.rules.get('ipv6_unsupported_platforms', [])
+        )
+        # (predicate, option) pairs for decision_rules.root_domain, in rule order
+        self._compiled_root_rules = tuple(
+            (_compile_when(rule.get('when', {})), rule.get('use'))
+            for rule in self.rules.get('decision_rules', {}).get('root_domain', [])
+        )
+        # Alias -> platform rules, and alias -> normalized target nameservers
+        self._platform_map = {}
+        self._platform_ns = {}
+        platforms = self.rules['platforms']
+        for key, aliases in _PLATFORM_ALIASES.items():
+            if key not in platforms:
+                continue
+            platform = platforms[key]
+            nameservers = frozenset(platform.get('nameservers', []))
+            for alias in aliases:
+                self._platform_map[alias] = platform
+                self._platform_ns[alias] = nameservers
 
     def _load_config(self):
+        resolved = _RESOLVED_PATHS.get(self.config_path)
+        if resolved is None:
+            # Absolute, so a later chdir doesn't point the cached entry elsewhere
+            resolved = os.path.abspath(self._resolve_path())
+            _RESOLVED_PATHS[self.config_path] = resolved
+        self.config_path = resolved
+
+        st = os.stat(resolved)
+        entry = _CONFIG_CACHE.get(resolved)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+
+        rules = _read_rules(resolved)
+        _normalize_rule_values(rules)
+        _CONFIG_CACHE.pop(resolved, None)
+        if len(_CONFIG_CACHE) >= _CONFIG_CACHE_SIZE:
+            _CONFIG_CACHE.pop(next(iter(_CONFIG_CACHE)), None)
+        _CONFIG_CACHE[resolved] = (st.st_mtime_ns, st.st_size, rules)
+        return rules
+
+    def _resolve_path(self):
         # Try multiple possible locations for the config file
         possible_paths = [
             self.config_path,  # Current directory
@@ -17,22 +175,22 @@ class ConfigLoader:
         
         for path in possible_paths:
             if os.path.exists(path):
-                self.config_path = path
-                break
-        else:
-            raise FileNotFoundError(f"Config file not found. Tried: {possible_paths}")
-
-        with open(self.config_path, 'r') as f:
-            return yaml.safe_load(f)
+                return path
+        raise FileNotFoundError(f"Config file not found. Tried: {possible_paths}")
 
     def get_platform(self, platform_id):
         # Normalize platform_id to lowercase
-        pid = platform_id.lower()
-        if pid in ['attractwell', 'aw']:
-            return self.rules['platforms']['attractwell']
-        if pid in ['getoiling', 'get oiling', 'go']:
-            return self.rules['platforms']['getoiling']
-        raise ValueError(f"Unknown platform: {platform_id}")
+        try:
+            return self._platform_map[platform_id.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown platform: {platform_id}") from None
+
+    def get_platform_nameservers(self, platform_id):
+        """Returns the platform's nameservers as a frozenset of lowercase names without trailing dots."""
+        try:
+            return self._platform_ns[platform_id.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown platform: {platform_id}") from None
 
     def get_email_rules(self):
         return self.rules['email_rules']
@@ -40,6 +198,10 @@ class ConfigLoader:
     def get_decision_rules(self):
         return self.rules['decision_rules']
     
+    def get_compiled_root_rules(self):
+        """Returns the root-domain decision rules as (predicate(intent), use) pairs."""
+        return self._compiled_root_rules
+
     def get_delegate_access_rules(self):
         return self.rules['delegate_access']
 
@@ -67,5 +229,8 @@ class ConfigLoader:
         Returns:
             bool: True if platform supports IPv6, False if AAAA must be removed
         """
-        unsupported = self.rules.get('ipv6_unsupported_platforms', [])
-        return platform.lower() not in [p.lower() for p in unsupported]
+        return platform.lower() not in self._ipv6_unsupported
+
+
+if __name__ == "__main__":
+    print(build_rules_cache(*sys.argv[1:2]))
@@ -1,34 +1,28 @@
 import os
+import re
+import copy
 import json
-from typing import List, Dict, Optional
-from openai import OpenAI
+import hashlib
+import secrets
+from collections import OrderedDict
+from typing import List, Dict, Iterator, Optional
 from dotenv import load_dotenv
 
+try:
+    from logic.ai_translator import _get_client, _get_async_client
+except ImportError:  # run from inside logic/ (conversational_cli.py)
+    from ai_translator import _get_client, _get_async_client
+
 load_dotenv()
 
-class ConversationalAgent:
-    """Phase 3: Conversational layer with memory.
-    
-    This class adds conversational capabilities on top of Phase 1 (deterministic) 
-    and Phase 2 (bounded translation). It allows follow-up questions while staying
-    grounded in the original diagnostic data.
-    """
-    
-    def __init__(self, model="gpt-4o-mini"):
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables.")
-        self.client = OpenAI(api_key=self.api_key)
-        self.model = model
-        
-    def _get_system_prompt(self, diagnostic_data: dict, audience: str = "customer") -> str:
-        """Generate system prompt that grounds conversation in diagnostic data."""
-        
-        base_context = f"""
+# Static instructions only, so every turn (and every session with the same
+# audience) sends an identical prefix that OpenAI can serve from its prompt
+# cache. The per-domain diagnostic goes in a separate user message.
+_RULES_PREAMBLE = """
 You are a helpful DNS assistant having a conversation about domain connection diagnostics.
 
 **CRITICAL - HOW TO USE THE DIAGNOSTIC DATA**:
-The diagnostic data below contains everything you know about the domain "{diagnostic_data.get('domain', 'unknown')}".
+The DIAGNOSTIC DATA message at the start of the conversation contains everything you know about the domain.
 
 **WHERE TO FIND DNS RECORDS** (for answering "What is my X record?"):
 Look in `dns_snapshot`:
@@ -68,33 +62,166 @@ Look in `dns_snapshot`:
 4. **STAY GROUNDED**: Only answer questions about what's IN the diagnostic data
 5. If truly not in the data, say: "That's not included in this diagnostic report."
 
-**THE DIAGNOSTIC DATA**:
-{json.dumps(diagnostic_data, indent=2)}
-
-**END OF YOUR KNOWLEDGE**
+Empty fields are left out of the diagnostic data: a missing `conflicts`, `warnings`, etc. means there are none.
 """
 
-        if audience == "support":
-            return base_context + """
+_AUDIENCE_BLOCKS = {
+    "support": """
 **YOUR AUDIENCE**: Internal support staff (technical)
 **YOUR TONE**: Professional, technical, use DNS terminology
 **YOUR GOAL**: Help support staff understand the diagnostic quickly and answer their technical questions
-"""
-        else:  # customer
-            return base_context + """
+""",
+    "customer": """
 **YOUR AUDIENCE**: Business owners (likely non-technical)
 **YOUR TONE**: Friendly, patient, use plain English
 **YOUR GOAL**: Help them understand what's happening with their domain and what they need to do next
 
 Avoid jargon. If you must use technical terms, explain them simply.
 """
+}
+
+# Diagnostic fields that are not sent to the model
+_OMITTED_KEYS = frozenset({'ai_insights'})
+
+def _drop_empty(value):
+    """Recursively remove None values and empty lists/dicts."""
+    if isinstance(value, dict):
+        cleaned = {k: _drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v is not None and v != [] and v != {}}
+    if isinstance(value, list):
+        cleaned = [_drop_empty(v) for v in value]
+        return [v for v in cleaned if v is not None and v != [] and v != {}]
+    return value
+
+# Phrases the model uses when it admits the answer isn't in the report
+_GROUNDING_RE = re.compile(r"don't have|not in", re.IGNORECASE)
+
+class ConversationalAgent:
+    """Phase 3: Conversational layer with memory.
+    
+    This class adds conversational capabilities on top of Phase 1 (deterministic) 
+    and Phase 2 (bounded translation). It allows follow-up questions while staying
+    grounded in the original diagnostic data.
+    """
+    
+    def __init__(self, model="gpt-4o-mini"):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables.")
+        # Same keep-alive pool as the translator, so repeated turns reuse the connection
+        self.client = _get_client(self.api_key)
+        self.model = model
+        # Serialized diagnostics keyed by id(); the dict itself is kept alongside
+        # so an id reused by a new object is never mistaken for a hit
+        self._diag_cache = {}
+        # (diagnostic dict, grounding message) from the most recent turn
+        self._last_diag_message = None
+        # Successful replies keyed by _response_cache_key(), least recently used first
+        self._response_cache = OrderedDict()
+        
+    # Built once at import from the module-level blocks above
+    SYSTEM_SUPPORT = _RULES_PREAMBLE + _AUDIENCE_BLOCKS["support"]
+    SYSTEM_CUSTOMER = _RULES_PREAMBLE + _AUDIENCE_BLOCKS["customer"]
+
+    # chat()/achat() replies are structured, which keeps them short; the cap
+    # covers the envelope and references too. A reply cut off at the cap keeps
+    # whatever part of its message arrived (see _partial_message)
+    REPLY_MAX_TOKENS = 500
+
+    _REPLY_FORMAT = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "chat_reply",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "message": {"type": "string", "description": "The reply shown to the user"},
+                    "grounded": {
+                        "type": "boolean",
+                        "description": "False if the answer is not (fully) contained in the diagnostic data"
+                    },
+                    "references": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Diagnostic fields the reply is based on, e.g. dns_snapshot.MX"
+                    }
+                },
+                "required": ["message", "grounded", "references"],
+                "additionalProperties": False
+            }
+        }
+    }
+
+    def _get_system_prompt(self, audience: str = "customer") -> str:
+        """Return the static system prompt for the audience."""
+        if audience == "support":
+            return self.SYSTEM_SUPPORT
+        return self.SYSTEM_CUSTOMER
+
+    _DIAG_CACHE_SIZE = 32
+
+    def _serialize_diagnostic(self, diagnostic_data: dict) -> str:
+        """Serialize diagnostic data once per object instead of on every turn.
+        
+        Diagnostic data is treated as read-only once handed to the agent.
+        """
+        key = id(diagnostic_data)
+        cached = self._diag_cache.get(key)
+        if cached is not None and cached[0] is diagnostic_data:
+            return cached[1]
+        
+        # ai_insights is generated text the model doesn't need to re-read, and
+        # empty fields only cost tokens. sort_keys keeps equal diagnostics
+        # byte-identical for prompt caching.
+        trimmed = _drop_empty({k: v for k, v in diagnostic_data.items() if k not in _OMITTED_KEYS})
+        serialized = json.dumps(trimmed, separators=(',', ':'), sort_keys=True)
+        if len(self._diag_cache) >= self._DIAG_CACHE_SIZE:
+            self._diag_cache.pop(next(iter(self._diag_cache)))
+        self._diag_cache[key] = (diagnostic_data, serialized)
+        return serialized
+
+    def _get_diagnostic_message(self, diagnostic_data: dict) -> dict:
+        """Build the user message that grounds the conversation in diagnostic data."""
+        # Fast path: a session keeps passing the same diagnostic object
+        last = self._last_diag_message
+        if last is not None and last[0] is diagnostic_data:
+            return last[1]
+        
+        message = {
+            "role": "user",
+            "content": f"""**THE DIAGNOSTIC DATA** for the domain "{diagnostic_data.get('domain', 'unknown')}":
+{self._serialize_diagnostic(diagnostic_data)}
+
+**END OF YOUR KNOWLEDGE**"""
+        }
+        self._last_diag_message = (diagnostic_data, message)
+        return message
+
+    def _build_messages(
+        self,
+        diagnostic_data: dict,
+        conversation_history: List[Dict[str, str]],
+        user_message: str,
+        audience: str = "customer"
+    ) -> List[Dict[str, str]]:
+        """Build the full conversation: static prompt, then the diagnostic, then the turns."""
+        messages = [
+            {"role": "system", "content": self._get_system_prompt(audience)},
+            self._get_diagnostic_message(diagnostic_data)
+        ]
+        messages.extend(conversation_history)
+        messages.append({"role": "user", "content": user_message})
+        return messages
 
     def chat(
         self, 
         diagnostic_data: dict, 
         conversation_history: List[Dict[str, str]], 
         user_message: str,
-        audience: str = "customer"
+        audience: str = "customer",
+        turn: Optional[int] = None,
+        use_cache: bool = True
     ) -> dict:
         """
         Handle a conversational turn grounded in diagnostic data.
@@ -104,6 +231,11 @@ Avoid jargon. If you must use technical terms, explain them simply.
             conversation_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
             user_message: The new user message
             audience: "customer" or "support"
+            turn: Turn number reported as conversation_turn; when omitted it is
+                derived from the history length
+            use_cache: Reuse the reply to an identical earlier turn (same diagnostic,
+                history, message and audience); pass False when a fresh answer
+                is required
             
         Returns:
             {
@@ -113,46 +245,264 @@ Avoid jargon. If you must use technical terms, explain them simply.
             }
         """
         
-        system_prompt = self._get_system_prompt(diagnostic_data, audience)
+        if use_cache:
+            cache_key = self._response_cache_key(diagnostic_data, conversation_history, user_message, audience, turn)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
         
-        # Build full conversation
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": user_message})
+        messages = self._build_messages(diagnostic_data, conversation_history, user_message, audience)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.4,
-                max_tokens=500
-            )
+            response = self.client.chat.completions.create(**self._reply_request(messages))
             
-            ai_message = response.choices[0].message.content
+            result = self._structured_response(response, conversation_history, audience, turn)
+            if use_cache:
+                self._store_response(cache_key, result)
+            return result
             
+        except Exception as e:
+            return self.build_error_response(e)
+
+    async def achat(
+        self, 
+        diagnostic_data: dict, 
+        conversation_history: List[Dict[str, str]], 
+        user_message: str,
+        audience: str = "customer",
+        turn: Optional[int] = None,
+        use_cache: bool = True
+    ) -> dict:
+        """
+        Async variant of chat() so several sessions can be in flight at once.
+        
+        Takes the same arguments and returns the same shape as chat().
+        """
+        if use_cache:
+            cache_key = self._response_cache_key(diagnostic_data, conversation_history, user_message, audience, turn)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+        
+        messages = self._build_messages(diagnostic_data, conversation_history, user_message, audience)
+        
+        try:
+            response = await self.aclient.chat.completions.create(**self._reply_request(messages))
+            result = self._structured_response(response, conversation_history, audience, turn)
+            if use_cache:
+                self._store_response(cache_key, result)
+            return result
+            
+        except Exception as e:
+            return self.build_error_response(e)
+
+    def chat_stream(
+        self, 
+        diagnostic_data: dict, 
+        conversation_history: List[Dict[str, str]], 
+        user_message: str,
+        audience: str = "customer"
+    ) -> Iterator[str]:
+        """
+        Stream the reply to a conversational turn as it is generated.
+        
+        Takes the same arguments as chat() and yields content deltas. Join them
+        and pass the text to build_response() to get chat()'s envelope.
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(diagnostic_data, conversation_history, user_message, audience),
+            temperature=0.4,
+            max_tokens=500,
+            stream=True
+        )
+        
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    yield choice.delta.content
+                if choice.finish_reason is not None:
+                    break
+        finally:
+            stream.close()
+
+    @property
+    def aclient(self):
+        """Pooled async client for the running event loop, shared with the translator."""
+        return _get_async_client(self.api_key)
+
+    _RESPONSE_CACHE_SIZE = 256
+
+    def _response_cache_key(self, diagnostic_data, conversation_history, user_message, audience, turn):
+        payload = json.dumps(
+            [self.model, self._serialize_diagnostic(diagnostic_data), conversation_history, user_message, audience, turn],
+            sort_keys=True
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def _cached_response(self, key):
+        cached = self._response_cache.get(key)
+        if cached is None:
+            return None
+        self._response_cache.move_to_end(key)
+        return copy.deepcopy(cached)
+
+    def _store_response(self, key, result):
+        self._response_cache[key] = copy.deepcopy(result)
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > self._RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+
+    def _reply_request(self, messages) -> dict:
+        """Arguments for a structured chat()/achat() completion."""
+        return {
+            "model": self.model,
+            "messages": messages,
+            "response_format": self._REPLY_FORMAT,
+            "temperature": 0.4,
+            "max_tokens": self.REPLY_MAX_TOKENS,
+        }
+
+    @staticmethod
+    def _partial_message(content: str) -> Optional[str]:
+        """The "message" text of a structured reply that was cut off mid-JSON."""
+        start = content.find('"message"')
+        start = content.find('"', content.find(':', start) + 1) if start != -1 else -1
+        if start == -1:
+            return None
+        try:
+            return json.decoder.scanstring(content, start + 1)[0]  # message itself arrived whole
+        except ValueError:
+            pass
+        fragment = content[start + 1:]
+        # Drop a trailing escape sequence that was itself cut in half
+        for end in range(len(fragment), max(len(fragment) - 6, -1), -1):
+            try:
+                return json.loads('"' + fragment[:end] + '"')
+            except ValueError:
+                continue
+        return None
+
+    def _structured_response(
+        self,
+        response,
+        conversation_history: List[Dict[str, str]],
+        audience: str,
+        turn: Optional[int] = None
+    ) -> dict:
+        content = response.choices[0].message.content
+        try:
+            reply = json.loads(content)
+            message, grounded, references = reply["message"], reply["grounded"], reply["references"]
+        except (TypeError, ValueError, KeyError):
+            # Cut off at the token cap: show the part of the message that did
+            # arrive rather than the raw JSON fragment
+            message = None
+            if response.choices[0].finish_reason == "length" and content:
+                message = self._partial_message(content)
+            if message is None:
+                # Not the structured shape; keep the raw text
+                message = content or ""
+            return self.build_response(message, conversation_history, audience, usage=response.usage, turn=turn)
+        return self.build_response(
+            message,
+            conversation_history,
+            audience,
+            usage=response.usage,
+            grounded=grounded,
+            references=references,
+            turn=turn
+        )
+
+    def build_response(
+        self,
+        ai_message: str,
+        conversation_history: List[Dict[str, str]],
+        audience: str,
+        usage=None,
+        grounded: Optional[bool] = None,
+        references: Optional[List[str]] = None,
+        turn: Optional[int] = None
+    ) -> dict:
+        """Wrap a reply in the same envelope chat() returns.
+        
+        grounded/references come from the structured reply when available;
+        for plain-text replies groundedness falls back to a phrase heuristic.
+        When the API usage object is given, prompt and cached token counts are
+        added to _metadata so prefix-cache hits can be checked turn by turn.
+        """
+        if grounded is None:
             # Simple check: did AI stay grounded?
             # If it says "not in the report" or "I don't have", it's being honest
-            grounded = True
-            if "don't have" in ai_message.lower() or "not in" in ai_message.lower():
-                grounded = "partial"  # AI admitted knowledge gap
+            grounded = not _GROUNDING_RE.search(ai_message)
+        if not grounded:
+            grounded = "partial"  # AI admitted knowledge gap
+        
+        metadata = {
+            "model": self.model,
+            "audience": audience,
+            "phase": 3
+        }
+        if usage is not None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            metadata["prompt_tokens"] = usage.prompt_tokens
+            metadata["cached_tokens"] = getattr(details, 'cached_tokens', None) or 0
+        
+        return {
+            "message": ai_message,
+            "grounded": grounded,
+            "references": references or [],
+            "conversation_turn": turn if turn is not None else len(conversation_history) // 2 + 1,
+            "_metadata": metadata
+        }
+
+    def build_error_response(self, e: Exception) -> dict:
+        """Envelope returned when a turn fails."""
+        return {
+            "message": f"I apologize, I'm having trouble processing that question. Error: {str(e)}",
+            "grounded": False,
+            "error": str(e)
+        }
+
+    def chat_multi(
+        self,
+        diagnostic_data: dict,
+        conversation_history: List[Dict[str, str]],
+        user_message: str,
+        audience: str = "customer",
+        n: int = 1
+    ) -> List[str]:
+        """
+        Sample several alternative replies to the same turn in one request.
+        
+        Prefer this over calling chat() in a loop: the prompt (system prompt,
+        diagnostic and history) is processed once for all n samples instead of
+        once per call.
+        
+        Args:
+            diagnostic_data: The original Phase 1 diagnostic output (source of truth)
+            conversation_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
+            user_message: The new user message
+            audience: "customer" or "support"
+            n: Number of alternative replies to generate
             
-            return {
-                "message": ai_message,
-                "grounded": grounded,
-                "conversation_turn": len(conversation_history) // 2 + 1,
-                "_metadata": {
-                    "model": self.model,
-                    "audience": audience,
-                    "phase": 3
-                }
-            }
+        Returns:
+            List of n reply strings
             
-        except Exception as e:
-            return {
-                "message": f"I apologize, I'm having trouble processing that question. Error: {str(e)}",
-                "grounded": False,
-                "error": str(e)
-            }
+        Raises:
+            openai.OpenAIError: If the request fails
+        """
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(diagnostic_data, conversation_history, user_message, audience),
+            temperature=0.4,
+            max_tokens=500,
+            n=n
+        )
+        return [choice.message.content for choice in response.choices]
 
     def start_conversation(self, diagnostic_data: dict, audience: str = "customer") -> dict:
         """
@@ -204,7 +554,7 @@ Avoid jargon. If you must use technical terms, explain them simply.
         return {
             "opening_message": opening,
             "suggested_questions": suggested,
-            "session_id": os.urandom(8).hex(),  # Generate session ID
+            "session_id": secrets.token_hex(8),  # Generate session ID
             "grounded_in": diagnostic_data.get('domain'),
             "_metadata": {
                 "audience": audience,
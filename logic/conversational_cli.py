@@ -5,10 +5,55 @@ Allows chat-based interactions grounded in diagnostic data.
 """
 
 import argparse
+import asyncio
 import json
 import sys
 from conversational_agent import ConversationalAgent
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+def load_json_arg(value):
+    """Load JSON from a file path, '-' for stdin, or an inline JSON string."""
+    if value == '-':
+        return _loads(sys.stdin.buffer.read())
+    if value.lstrip()[:1] in ('{', '['):
+        return _loads(value)
+    with open(value, 'rb') as f:
+        return _loads(f.read())
+
+async def run_batch(agent, rows, audience, concurrency):
+    """Run achat() for every row with at most `concurrency` requests in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def answer(row):
+        async with semaphore:
+            return await agent.achat(
+                row['diagnostic'],
+                row.get('history', []),
+                row['message'],
+                audience=row.get('audience', audience)
+            )
+    
+    return await asyncio.gather(*(answer(row) for row in rows))
+
+def run_repl(agent, diagnostic_data, audience):
+    """Answer stdin lines in one session, reusing the agent's client and history."""
+    history = []
+    print(agent.start_conversation(diagnostic_data, audience=audience)['opening_message'])
+    for line in sys.stdin:
+        message = line.strip()
+        if not message:
+            continue
+        result = agent.chat(diagnostic_data, history, message, audience=audience)
+        print(result['message'], flush=True)
+        if 'error' not in result:
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": result['message']})
+
 def main():
     parser = argparse.ArgumentParser(description="DNS Diagnostic Conversational Agent (Phase 3)")
     
@@ -16,31 +61,72 @@ def main():
     
     # Start conversation
     start_parser = subparsers.add_parser('start', help='Start a new conversation')
-    start_parser.add_argument('--diagnostic', required=True, help='Diagnostic data JSON')
+    start_parser.add_argument('--diagnostic', required=True, help='Diagnostic data: JSON file path, - for stdin, or inline JSON')
     start_parser.add_argument('--audience', choices=['customer', 'support'], default='customer', help='Audience type')
     
     # Chat
     chat_parser = subparsers.add_parser('chat', help='Continue conversation')
-    chat_parser.add_argument('--diagnostic', required=True, help='Diagnostic data JSON')
-    chat_parser.add_argument('--history', required=True, help='Conversation history JSON')
+    chat_parser.add_argument('--diagnostic', required=True, help='Diagnostic data: JSON file path, - for stdin, or inline JSON')
+    chat_parser.add_argument('--history', required=True, help='Conversation history: JSON file path, - for stdin, or inline JSON')
     chat_parser.add_argument('--message', required=True, help='User message')
     chat_parser.add_argument('--audience', choices=['customer', 'support'], default='customer', help='Audience type')
+    chat_parser.add_argument('--stream', action='store_true', help='Print the reply as it is generated, then the JSON result')
+    
+    # Interactive session
+    repl_parser = subparsers.add_parser('repl', help='Chat interactively, one message per line on stdin')
+    repl_parser.add_argument('--diagnostic', required=True, help='Diagnostic data: JSON file path or inline JSON (stdin carries the messages)')
+    repl_parser.add_argument('--audience', choices=['customer', 'support'], default='customer', help='Audience type')
+    
+    # Batch
+    batch_parser = subparsers.add_parser('batch', help='Answer many conversations concurrently')
+    batch_parser.add_argument('--input', required=True, help='JSONL file with one {"diagnostic", "history", "message"} object per line')
+    batch_parser.add_argument('--audience', choices=['customer', 'support'], default='customer', help='Default audience for rows without one')
+    batch_parser.add_argument('--concurrency', type=int, default=8, help='Maximum requests in flight')
     
     args = parser.parse_args()
+    # stdin can only be read once, and repl needs it for the messages
+    if args.command == 'chat' and args.diagnostic == '-' and args.history == '-':
+        chat_parser.error("only one of --diagnostic and --history can be read from stdin ('-')")
+    if args.command == 'repl' and args.diagnostic == '-':
+        repl_parser.error("--diagnostic cannot be '-': repl reads messages from stdin")
     
     agent = ConversationalAgent()
     
     if args.command == 'start':
-        diagnostic_data = json.loads(args.diagnostic)
+        diagnostic_data = load_json_arg(args.diagnostic)
         result = agent.start_conversation(diagnostic_data, audience=args.audience)
         print(json.dumps(result, indent=2))
         
     elif args.command == 'chat':
-        diagnostic_data = json.loads(args.diagnostic)
-        history = json.loads(args.history)
-        result = agent.chat(diagnostic_data, history, args.message, audience=args.audience)
+        diagnostic_data = load_json_arg(args.diagnostic)
+        history = load_json_arg(args.history)
+        if args.stream:
+            chunks = []
+            try:
+                for chunk in agent.chat_stream(diagnostic_data, history, args.message, audience=args.audience):
+                    chunks.append(chunk)
+                    print(chunk, end='', flush=True)
+                print()
+                result = agent.build_response(''.join(chunks), history, args.audience)
+            except Exception as e:
+                print()
+                result = agent.build_error_response(e)
+        else:
+            result = agent.chat(diagnostic_data, history, args.message, audience=args.audience)
         print(json.dumps(result, indent=2))
         
+    elif args.command == 'repl':
+        diagnostic_data = load_json_arg(args.diagnostic)
+        run_repl(agent, diagnostic_data, args.audience)
+        
+    elif args.command == 'batch':
+        with open(args.input) as f:
+            rows = [_loads(line) for line in f if line.strip()]
+        results = asyncio.run(run_batch(agent, rows, args.audience, args.concurrency))
+        # One result per line, in input order
+        for result in results:
+            print(json.dumps(result))
+        
     else:
         parser.print_help()
         sys.exit(1)
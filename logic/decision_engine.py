@@ -1,29 +1,140 @@
 import tldextract
-import re
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+# Bundled public suffix list only: no network fetch or disk cache on cold start
+_TLD_EXTRACT = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+@lru_cache(maxsize=None)
+def _single_label_suffixes() -> FrozenSet[str]:
+    """Public suffixes with no dot in them (com, uk, io, ...)."""
+    return frozenset(tld for tld in _TLD_EXTRACT.tlds if '.' not in tld)
+
+# Nameservers NameBright assigns to expired domains
+_EXPIRED_NS_SET = frozenset({'expired1.namebrightdns.com', 'expired2.namebrightdns.com'})
+
+def _norm(value: str) -> str:
+    """Normalize a DNS name or record value for comparison."""
+    return value.rstrip('.').lower()
+
+def _is_subdomain(domain: str) -> bool:
+    # Fast path: 'example.com' / 'www.example.com' under a known suffix can
+    # never have a subdomain part other than 'www', whatever the full PSL says
+    labels = (domain[:-1] if domain.endswith('.') else domain).split('.')
+    if (len(labels) == 2 or (len(labels) == 3 and labels[0] == 'www')) \
+            and labels[-1].lower() in _single_label_suffixes():
+        return False
+    return _extract_is_subdomain(domain)
+
+@lru_cache(maxsize=1024)
+def _extract_is_subdomain(domain: str) -> bool:
+    extracted = _TLD_EXTRACT(domain)
+    # If subdomain part exists and isn't just 'www'
+    # Actually checklist says: "CNAME www -> root domain"
+    # So 'www' counts as part of root setup usually.
+    # But if user enters 'www.example.com', do they mean root?
+    # Usually yes.
+    # If user enters 'shop.example.com', that's a subdomain.
+    if extracted.subdomain and extracted.subdomain != 'www':
+        return True
+    return False
+
+@dataclass(slots=True)
+class Decision:
+    """
+    Result of DecisionEngine.evaluate().
+
+    Supports decision['key'], decision.get('key') and 'key' in decision so code
+    written against the old dict shape keeps working; to_dict() gives that dict
+    form. snapshot_index is private: attribute access only.
+    """
+    domain: str
+    platform: str
+    is_subdomain: bool
+    connection_option: Optional[str]
+    warnings: List[str]
+    warning_codes: Set[str]
+    conflicts: List[Dict[str, Any]]
+    delegate_access: Dict[str, Any]
+    email_state: Dict[str, Any]
+    # The snapshot and its normalized values, so the plan builder can reuse
+    # them instead of re-normalizing every record; not part of to_dict()
+    snapshot_index: Optional[Tuple[Dict[str, Any], Dict[str, List[str]]]] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _DECISION_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _DECISION_KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _DECISION_KEYS else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict form; warning_codes becomes a sorted list."""
+        data = {key: getattr(self, key) for key in _DECISION_KEYS}
+        data['warning_codes'] = sorted(self.warning_codes)
+        return data
+
+
+# Keys readable through the dict-style interface
+_DECISION_KEYS = tuple(f.name for f in fields(Decision) if f.name != 'snapshot_index')
 
 class DecisionEngine:
     def __init__(self, config_loader):
         self.config = config_loader
+        # Rules are immutable once loaded, so they are fetched once per engine
+        self._decision_rules = config_loader.get_decision_rules()
+        self._root_rules = config_loader.get_compiled_root_rules()
+        self._delegate_rules = config_loader.get_delegate_access_rules()
+        self._mx_warning = config_loader.get_warning('mx_present')
 
-    def is_subdomain(self, domain):
-        extracted = tldextract.extract(domain)
-        # If subdomain part exists and isn't just 'www'
-        # Actually checklist says: "CNAME www -> root domain"
-        # So 'www' counts as part of root setup usually.
-        # But if user enters 'www.example.com', do they mean root?
-        # Usually yes.
-        # If user enters 'shop.example.com', that's a subdomain.
-        if extracted.subdomain and extracted.subdomain != 'www':
-            return True
-        return False
+    def is_subdomain(self, domain: str) -> bool:
+        # The public-suffix lookup is comparatively slow, so results are memoized
+        return _is_subdomain(domain)
+
+    def _index_snapshot(
+        self, dns_snapshot: Dict[str, Any]
+    ) -> Tuple[Dict[str, List[str]], Dict[Tuple[str, str], List[Dict[str, Any]]]]:
+        """Index the snapshot in a single pass per evaluate() call.
+        
+        Returns (values, by_host):
+            values: {record_key: [normalized value, ...]}, parallel to each
+                record list in the snapshot
+            by_host: {(record_key, host without trailing dot): [record, ...]}
+        so checks can look records up without re-scanning and re-normalizing.
+        """
+        values = {}
+        by_host = {}
+        for key, records in dns_snapshot.items():
+            if isinstance(records, list):
+                values[key] = [_norm(r.get('value', '')) for r in records]
+                for r in records:
+                    by_host.setdefault((key, r.get('host', '').rstrip('.')), []).append(r)
+        return values, by_host
 
-    def evaluate(self, domain, platform_id, intent, email_state, dns_snapshot):
+    def evaluate(
+        self,
+        domain: str,
+        platform_id: str,
+        intent: Dict[str, Any],
+        email_state: Dict[str, Any],
+        dns_snapshot: Dict[str, Any],
+    ) -> Decision:
         is_sub = self.is_subdomain(domain)
+        snapshot_values, records_by_host = self._index_snapshot(dns_snapshot)
         platform_rules = self.config.get_platform(platform_id)
-        decision_rules = self.config.get_decision_rules()
+        decision_rules = self._decision_rules
 
         # 1. Determine Identity (Root vs Subdomain)
         warnings = []
+        # Machine-readable code for each warning, for callers that branch on them
+        warning_codes = set()
         
         # 2. Select Connection Option
         connection_option = None
@@ -36,31 +147,11 @@ class DecisionEngine:
              if sub_rules.get('always_use') == 'cname_only':
                  connection_option = 'cname_only'
         else:
-            # Root rules
-            root_rules = decision_rules.get('root_domain', [])
-            # Evaluate "when" conditions
-            # supported intent flags in yaml: external_dependencies
-            # We need to map our intent dict to the yaml keys.
-            
-            # Simple evaluator
-            for rule in root_rules:
-                conditions = rule.get('when', {})
-                match = True
-                for k, v in conditions.items():
-                    # Map yaml key to intent key if needed, or assume 1:1
-                    # Yaml keys: external_dependencies
-                    # Intent keys: has_external_dependencies
-                    
-                    intent_val = None
-                    if k == 'external_dependencies':
-                        intent_val = intent.get('has_external_dependencies')
-                    
-                    if intent_val != v:
-                        match = False
-                        break
-                
-                if match:
-                    connection_option = rule.get('use')
+            # Root rules: "when" conditions are compiled to intent predicates
+            # at config load; first rule whose conditions all match wins
+            for matches, use in self._root_rules:
+                if matches(intent):
+                    connection_option = use
                     break
         
         # 3. Validation & Conflicts
@@ -77,27 +168,30 @@ class DecisionEngine:
                     "are using email on this domain. Switching to record-level DNS changes to "
                     "preserve existing email configuration."
                 )
+                warning_codes.add('CUSTOM_EMAIL_DETECTED')
             
-            mx_warning = self.config.get_warning('mx_present')
+            mx_warning = self._mx_warning
             if mx_warning:
                 warnings.append(mx_warning['message'])
+                warning_codes.add('MX_PRESENT')
         
         # Check for strict DMARC policy without MX records (defensive/intentional email blocking)
-        if email_state.get('has_dmarc') and not email_state.get('has_mx'):
+        elif email_state.get('has_dmarc'):
             dmarc_policy = email_state.get('dmarc_policy')
             if dmarc_policy in ['reject', 'quarantine']:
                 warnings.append(
                     f"DMARC is set to p={dmarc_policy}, but no MX records were found. "
                     "This is valid but may be intentional or defensive."
                 )
+                warning_codes.add('STRICT_DMARC_WITHOUT_MX')
 
         # Validate current DNS against chosen option
         if connection_option == 'option_1':
             # Option 1: Nameserver-based connection
             # Check if nameservers are already set correctly
-            current_ns = dns_snapshot.get('NS', [])
-            current_ns_vals = [r.get('value', '').rstrip('.').lower() for r in current_ns]
-            required_ns = [ns.rstrip('.').lower() for ns in platform_rules.get('nameservers', [])]
+            current_ns_vals = snapshot_values.get('NS', [])
+            # Platform values are normalized at config load
+            required_ns = platform_rules.get('nameservers', [])
             
             if all(ns in current_ns_vals for ns in required_ns):
                 # Already configured correctly
@@ -123,8 +217,7 @@ class DecisionEngine:
                 host = rec['host']
                 target_val = rec['value']
                 if target_val == "{root_domain}":
-                    target_val = domain
-                target_val = target_val.rstrip('.').lower()
+                    target_val = _norm(domain)
                 
                 # Determine the lookup key
                 lookup_key = rec_type
@@ -134,6 +227,7 @@ class DecisionEngine:
                     lookup_key = rec_type
                 
                 current_records = dns_snapshot.get(lookup_key, [])
+                current_values = snapshot_values.get(lookup_key, [])
                 
                 # Check for conflicting record types
                 if rec_type == 'CNAME':
@@ -182,10 +276,9 @@ class DecisionEngine:
                 
                 # Check if record matches target
                 if current_records:
-                    matched_records = [r for r in current_records if r.get('value', '').rstrip('.').lower() == target_val]
-                    incorrect_records = [r for r in current_records if r.get('value', '').rstrip('.').lower() != target_val]
+                    incorrect_records = [r for r, v in zip(current_records, current_values) if v != target_val]
                     
-                    if not matched_records:
+                    if target_val not in current_values:
                         conflicts.append({
                             "type": "record_mismatch",
                             "severity": "info",
@@ -208,12 +301,14 @@ class DecisionEngine:
         # Subdomain-specific validation
         if is_sub:
             sub_config = platform_rules.get('subdomain', {})
-            target = sub_config.get('target', '').rstrip('.').lower()
+            target = sub_config.get('target', '')
             
             # Check for conflicting A record on subdomain
             # Use the full domain for matching since dns_lookup uses full domain as host
-            current_a = [r for r in dns_snapshot.get('A', []) if r.get('host', '').rstrip('.') == domain.rstrip('.')]
-            has_sub_cname = any(r.get('host', '').rstrip('.') == domain.rstrip('.') for r in dns_snapshot.get('CNAME', []))
+            sub_host = domain.rstrip('.')
+            current_a = records_by_host.get(('A', sub_host), [])
+            current_cname = records_by_host.get(('CNAME', sub_host), [])
+            has_sub_cname = bool(current_cname)
             
             if current_a and not has_sub_cname:
                 conflicts.append({
@@ -229,9 +324,8 @@ class DecisionEngine:
                 })
             
             # Check existing CNAME
-            current_cname = [r for r in dns_snapshot.get('CNAME', []) if r.get('host', '').rstrip('.') == domain.rstrip('.')]
             if current_cname:
-                cname_val = current_cname[0].get('value', '').rstrip('.').lower()
+                cname_val = _norm(current_cname[0].get('value', ''))
                 if cname_val != target:
                     conflicts.append({
                         "type": "subdomain_cname_mismatch",
@@ -243,7 +337,7 @@ class DecisionEngine:
                     })
         
         # 4. Delegate Access
-        delegate_rules = self.config.get_delegate_access_rules()
+        delegate_rules = self._delegate_rules
         recommend_delegate = False
         
         # Check for NameBright (Internal Registrar)
@@ -251,8 +345,15 @@ class DecisionEngine:
         registrar = str(whois.get('registrar', '')).lower()
         ns_records = [str(r.get('value', '')).lower() for r in dns_snapshot.get('NS', [])]
         
-        is_namebright = 'namebright' in registrar or any('namebright' in ns for ns in ns_records)
-        is_namebright_expired = any(ns in ['expired1.namebrightdns.com', 'expired2.namebrightdns.com'] for ns in ns_records)
+        # One pass over the nameservers for both NameBright checks
+        is_namebright = 'namebright' in registrar
+        is_namebright_expired = False
+        for ns in ns_records:
+            if 'namebright' in ns:
+                is_namebright = True
+                if ns in _EXPIRED_NS_SET:
+                    is_namebright_expired = True
+                    break
         
         if is_namebright:
             if is_namebright_expired:
@@ -262,6 +363,7 @@ class DecisionEngine:
                     "There is a high chance the customer cancelled their account or failed to complete a transfer, "
                     "but it was almost certainly registered with us at one point."
                 )
+                warning_codes.add('NAMEBRIGHT_EXPIRED_NS')
             else:
                 warnings.append(
                     "This domain appears to be registered with NameBright. "
@@ -269,6 +371,7 @@ class DecisionEngine:
                     "there is a very high chance we registered this domain for you. "
                     "Confirm that the domain has been registered with us before proceeding. AKA, ask Colin and/or Greg."
                 )
+                warning_codes.add('NAMEBRIGHT_REGISTERED')
 
         # Check conditions
         rec_conditions = delegate_rules.get('recommend_if', [])
@@ -300,13 +403,15 @@ class DecisionEngine:
         }
 
         # Return structured decision
-        return {
-            "domain": domain,
-            "platform": platform_id,
-            "is_subdomain": is_sub,
-            "connection_option": connection_option,
-            "warnings": warnings,
-            "conflicts": conflicts,
-            "delegate_access": delegate_info,
-            "email_state": email_state
-        }
+        return Decision(
+            domain=domain,
+            platform=platform_id,
+            is_subdomain=is_sub,
+            connection_option=connection_option,
+            warnings=warnings,
+            warning_codes=warning_codes,
+            conflicts=conflicts,
+            delegate_access=delegate_info,
+            email_state=email_state,
+            snapshot_index=(dns_snapshot, snapshot_values),
+        )
@@ -0,0 +1,39 @@
+"""Local development server for the Python API handlers.
+
+Vercel runs each handler in api/ as its own function and manages concurrency
+itself, so this is only used when a handler is started directly (local dev or
+Docker), e.g. `python api/diagnose.py`.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that hands connections to a bounded worker pool
+    instead of starting a new thread for every request."""
+
+    def __init__(self, server_address, handler_class, max_workers=32):
+        super().__init__(server_address, handler_class)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http-worker")
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def run(handler_class):
+    """Serve handler_class on $PORT (default 8000) with $DEV_SERVER_WORKERS workers."""
+    port = int(os.getenv("PORT", "8000"))
+    max_workers = int(os.getenv("DEV_SERVER_WORKERS", "32"))
+    server = PooledHTTPServer(("127.0.0.1", port), handler_class, max_workers=max_workers)
+    print(f"Serving on http://127.0.0.1:{port} ({max_workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
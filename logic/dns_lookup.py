@@ -3,15 +3,210 @@ DNS Lookup Module - Security Hardened
 Implements all P1/P2 security controls from SECURITY_AUDIT.md
 """
 
+import asyncio
+import ipaddress
+import dns.asyncquery
+import dns.asyncresolver
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdatatype
 import dns.resolver
 import dns.exception
 import whois
+import tldextract
 import logging
 import re
-from typing import List, Dict, Any, Optional
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Answer caches shared by every DNSLookup instance with the same nameservers,
+# and by both its sync and async resolvers. dnspython expires entries at the
+# rrset TTL and also keeps NXDOMAIN/NoAnswer responses, so repeat lookups never
+# leave the process. Keyed by nameservers so one resolver's answers are never
+# served to an instance configured with another.
+_RESOLVER_CACHES: Dict[tuple, dns.resolver.LRUCache] = {}
+
+
+def _resolver_cache(nameservers: tuple) -> dns.resolver.LRUCache:
+    cache = _RESOLVER_CACHES.get(nameservers)
+    if cache is None:
+        cache = _RESOLVER_CACHES.setdefault(nameservers, dns.resolver.LRUCache(max_size=10000))
+    return cache
+
+# Parsed record types and query names, so hot-path resolves skip from_text()
+_RDTYPE = {t: dns.rdatatype.from_text(t) for t in ('A', 'AAAA', 'CNAME', 'MX', 'TXT', 'NS')}
+_qname = lru_cache(maxsize=4096)(dns.name.from_text)
+
+
+def _rdtype(record_type: str):
+    """Integer rdatatype for the common record types; other strings pass through."""
+    return _RDTYPE.get(record_type, record_type)
+
+
+# Authoritative nameserver data reused across bypass_cache_lookup calls:
+# domain -> (expires_at, ns_hostnames, {ns_hostname: ip}), on the monotonic clock
+_AUTH_NS_CACHE: Dict[str, tuple] = {}
+_AUTH_NS_CACHE_SIZE = 1024
+
+
+def _auth_ns_entry(domain: str) -> Optional[tuple]:
+    """Return the live auth-NS cache entry for domain, dropping it if expired."""
+    key = domain.lower()
+    entry = _AUTH_NS_CACHE.get(key)
+    if entry is not None and entry[0] <= time.monotonic():
+        _AUTH_NS_CACHE.pop(key, None)
+        return None
+    return entry
+
+
+def _store_auth_ns(domain: str, ttl: int, ns_hostnames: List[str],
+                   ns_ips: Optional[Dict[str, str]] = None) -> None:
+    """Cache (or extend) the auth-NS entry for domain; the shortest TTL wins."""
+    key = domain.lower()
+    expires_at = time.monotonic() + ttl
+    current = _auth_ns_entry(key)
+    if current is not None:
+        expires_at = min(expires_at, current[0])
+        ns_ips = {**current[2], **(ns_ips or {})}
+    elif len(_AUTH_NS_CACHE) >= _AUTH_NS_CACHE_SIZE:
+        _AUTH_NS_CACHE.pop(next(iter(_AUTH_NS_CACHE)), None)
+    _AUTH_NS_CACHE[key] = (expires_at, ns_hostnames, ns_ips or {})
+
+
+class Record(namedtuple(
+    'Record', 'type host value ttl priority source nameserver error warning truncated',
+    defaults=(None,) * 10
+)):
+    """
+    Immutable DNS record used inside the lookup pipeline.
+    
+    Tuples are cheap to build and safe to share between concurrent lookups;
+    as_dict() produces the public dict shape, leaving out unset fields.
+    """
+    __slots__ = ()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {field: value for field, value in zip(self._fields, self) if value is not None}
+
+
+def _as_dicts(records: Tuple[Record, ...]) -> List[Dict[str, Any]]:
+    """Convert internal records to the list-of-dicts shape callers expect."""
+    return [record.as_dict() for record in records]
+
+
+def _txt_value(rdata) -> str:
+    """Join the character-strings of a TXT rdata into a single value."""
+    strings = getattr(rdata, 'strings', None)
+    if strings is None:
+        return rdata.to_text().strip('"')
+    return b''.join(
+        s if isinstance(s, (bytes, bytearray)) else s.encode() for s in strings
+    ).decode('utf-8', 'replace')
+
+
+# python-whois blocks with no timeout of its own, so lookups run on this pool
+# and callers stop waiting after DNSLookup.WHOIS_TIMEOUT
+_WHOIS_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='whois')
+
+# Sync wrappers called from inside a running event loop (async frameworks,
+# notebooks) run their coroutine on a fresh loop in one of these threads
+_SYNC_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='dns-sync')
+
+
+def _run_sync(coro):
+    """asyncio.run() the coroutine, or on a worker thread if this thread already runs a loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass  # no loop in this thread: the common, direct case
+    else:
+        return _SYNC_POOL.submit(asyncio.run, coro).result()
+    return asyncio.run(coro)
+
+
+# Successful WHOIS results: registrable domain -> (expires_at, result), on the
+# monotonic clock. Registration data belongs to the apex, so every subdomain
+# of example.com shares one entry (and one registrar round trip).
+_WHOIS_CACHE: Dict[str, tuple] = {}
+_WHOIS_CACHE_SIZE = 1024
+
+# Bundled public suffix list only; never fetch it over the network
+_TLD_EXTRACT = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+
+@lru_cache(maxsize=4096)
+def _whois_key(domain: str) -> str:
+    """Registrable domain (e.g. example.co.uk) for a name, used as the WHOIS cache key."""
+    extracted = _TLD_EXTRACT(domain.lower())
+    if extracted.domain and extracted.suffix:
+        return f"{extracted.domain}.{extracted.suffix}"
+    return domain.lower()
+
+
+def _cached_whois(domain: str) -> Optional[Dict[str, Any]]:
+    """Return a copy of the memoized WHOIS result for domain, if still fresh."""
+    key = _whois_key(domain)
+    entry = _WHOIS_CACHE.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        _WHOIS_CACHE.pop(key, None)
+        return None
+    return {**entry[1], 'name_servers': list(entry[1]['name_servers'])}
+
+
+def _store_whois(domain: str, result: Dict[str, Any], ttl: float) -> None:
+    if len(_WHOIS_CACHE) >= _WHOIS_CACHE_SIZE:
+        _WHOIS_CACHE.pop(next(iter(_WHOIS_CACHE)), None)
+    _WHOIS_CACHE[_whois_key(domain)] = (time.monotonic() + ttl, result)
+
+
+# Built records per (nameservers, exact name, type): (expires_at, records), on
+# the monotonic clock. Sits in front of the resolver cache so repeats within the
+# answer's TTL also skip rebuilding records; failures are never stored.
+_RECORD_CACHE: Dict[tuple, tuple] = {}
+_RECORD_CACHE_SIZE = 4096
+
+
+def _cached_records(nameservers: tuple, domain: str, record_type: str) -> Optional[Tuple['Record', ...]]:
+    key = (nameservers, domain, record_type)
+    entry = _RECORD_CACHE.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        _RECORD_CACHE.pop(key, None)
+        return None
+    return entry[1]
+
+
+def _store_records(nameservers: tuple, domain: str, record_type: str,
+                   records: Tuple['Record', ...], answers) -> None:
+    # Answer.expiration is wall-clock and already covers negative (SOA) TTLs
+    ttl = answers.expiration - time.time()
+    if ttl <= 0:
+        return
+    if len(_RECORD_CACHE) >= _RECORD_CACHE_SIZE:
+        _RECORD_CACHE.pop(next(iter(_RECORD_CACHE)), None)
+    _RECORD_CACHE[(nameservers, domain, record_type)] = (time.monotonic() + ttl, records)
+
+
+# Valid domain regex (RFC 1035 compliant). Kept as the public
+# DNSLookup.DOMAIN_REGEX; validation itself uses _name_matches below.
+_DOMAIN_RE = re.compile(
+    r'^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$'
+)
+
+# Patterns used by _sanitize_error (P1-8)
+_PATH_RE = re.compile(r'/[^\s]+/[^\s]+|C:\\[^\s]+')  # Unix or Windows path
+_LINE_NUMBER_RE = re.compile(r'line \d+')
+
 class DNSLookup:
     """
     Security-hardened DNS lookup class.
@@ -28,8 +223,10 @@ class DNSLookup:
     MAX_RECORDS_PER_TYPE = 100     # Cap DNS records to prevent memory exhaustion
     DEFAULT_TIMEOUT = 5.0          # Per-server query timeout (seconds)
     DEFAULT_LIFETIME = 15.0        # Total query lifetime (seconds)
-    CNAME_DEPTH_LIMIT = 5          # Prevent infinite CNAME chains
+    CNAME_DEPTH_LIMIT = 6          # Prevent infinite CNAME chains
     MAX_DOMAIN_LENGTH = 253        # RFC 1035 limit
+    WHOIS_TIMEOUT = DEFAULT_LIFETIME  # Upper bound on a single WHOIS lookup (seconds)
+    WHOIS_CACHE_TTL = 3600         # Registrar data rarely changes; memoize for an hour
     
     # SSRF Protection: Block internal/private domains
     BLOCKED_DOMAIN_PATTERNS = [
@@ -52,9 +249,7 @@ class DNSLookup:
     ]
     
     # Valid domain regex (RFC 1035 compliant)
-    DOMAIN_REGEX = re.compile(
-        r'^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$'
-    )
+    DOMAIN_REGEX = _DOMAIN_RE
     
     # Industry-standard DKIM selectors
     STANDARD_DKIM_SELECTORS = [
@@ -67,6 +262,8 @@ class DNSLookup:
         'smtp',
         'mail'
     ]
+    # Query-name prefixes for the selectors above; the domain is appended per call
+    _DKIM_SUFFIXES = tuple(f"{s}._domainkey." for s in STANDARD_DKIM_SELECTORS)
 
     def __init__(self, nameservers: Optional[List[str]] = None, 
                  timeout: Optional[float] = None, 
@@ -90,9 +287,20 @@ class DNSLookup:
         else:
             # Use Cloudflare and Google as default public resolvers
             self.resolver.nameservers = ['1.1.1.1', '8.8.8.8']
-        
-        # Compile blocked patterns for performance
-        self._blocked_patterns = [re.compile(p, re.IGNORECASE) for p in self.BLOCKED_DOMAIN_PATTERNS]
+        # Cache key for the shared answer and record caches
+        self._cache_ns = tuple(self.resolver.nameservers)
+        self.resolver.cache = _resolver_cache(self._cache_ns)
+
+        # Async twin used by aget_all_records to fan lookups out on one event loop
+        self._aresolver = dns.asyncresolver.Resolver(configure=False)
+        self._aresolver.timeout = self.resolver.timeout
+        self._aresolver.lifetime = self.resolver.lifetime
+        self._aresolver.nameservers = list(self.resolver.nameservers)
+        self._aresolver.cache = self.resolver.cache
+
+        # (domain, type) -> Future for async lookups currently on the wire
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
 
     def _is_blocked_domain(self, domain: str) -> bool:
         """
@@ -103,12 +311,9 @@ class DNSLookup:
         - Private IP ranges
         - Localhost
         """
-        domain_lower = domain.lower().strip()
-        
-        for pattern in self._blocked_patterns:
-            if pattern.search(domain_lower):
-                logger.warning(f"Blocked SSRF attempt: {domain}")
-                return True
+        if _domain_is_blocked(domain):
+            logger.warning(f"Blocked SSRF attempt: {domain}")
+            return True
         
         return False
 
@@ -116,9 +321,13 @@ class DNSLookup:
         """Validate domain format (RFC 1035 compliant)."""
         if not domain or not isinstance(domain, str):
             return False
-        if len(domain) > self.MAX_DOMAIN_LENGTH:
+        return _domain_is_valid(domain)
+
+    def _is_valid_dns_name(self, domain: str) -> bool:
+        """Validate a query name, allowing underscore-prefixed labels like _dmarc."""
+        if not domain or not isinstance(domain, str):
             return False
-        return bool(self.DOMAIN_REGEX.match(domain))
+        return _dns_name_is_valid(domain)
 
     def _sanitize_error(self, error: Exception) -> str:
         """
@@ -128,12 +337,16 @@ class DNSLookup:
         """
         error_str = str(error)
         
-        # Remove file paths
-        error_str = re.sub(r'/[^\s]+/[^\s]+', '[PATH]', error_str)
-        error_str = re.sub(r'C:\\[^\s]+', '[PATH]', error_str)
+        # Each pattern needs a literal marker, so most resolver errors
+        # (timeouts, refusals) skip the regexes entirely
+        
+        # Remove file paths (one scan covers both path styles)
+        if '/' in error_str or 'C:\\' in error_str:
+            error_str = _PATH_RE.sub('[PATH]', error_str)
         
         # Remove line numbers
-        error_str = re.sub(r'line \d+', 'line [N]', error_str)
+        if 'line ' in error_str:
+            error_str = _LINE_NUMBER_RE.sub('line [N]', error_str)
         
         # Truncate long errors
         if len(error_str) > 200:
@@ -141,7 +354,8 @@ class DNSLookup:
         
         return error_str
 
-    def get_records(self, domain: str, record_type: str) -> List[Dict[str, Any]]:
+    def get_records(self, domain: str, record_type: str,
+                    lifetime: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Get DNS records with security limits.
         
@@ -150,93 +364,167 @@ class DNSLookup:
         - Record count limits (P1-5)
         - Timeout enforcement (P1-4)
         - Error sanitization (P1-8)
+        
+        Args:
+            lifetime: Total time budget for this call only; defaults to the resolver's
         """
-        # Security: Validate domain
-        if not self._is_valid_domain(domain) and not domain.startswith('_'):
-            # Allow underscore prefixes for _dmarc, _domainkey, etc.
-            if not self._is_valid_domain(domain.lstrip('_').split('.', 1)[-1] if '.' in domain else ''):
-                logger.warning(f"Invalid domain format rejected: {domain}")
-                return [{'error': 'Invalid domain format', 'type': record_type}]
+        rejected = self._screen_query(domain, record_type)
+        if rejected is not None:
+            return _as_dicts(rejected)
+        
+        cached = _cached_records(self._cache_ns, domain, record_type)
+        if cached is not None:
+            return _as_dicts(cached)
+        
+        try:
+            # An empty answer comes back as an Answer with no rrset rather than
+            # a raised NoAnswer, which is the common case for optional records
+            answers = self.resolver.resolve(_qname(domain), _rdtype(record_type), lifetime=lifetime,
+                                            raise_on_no_answer=False)
+            records = self._build_records(domain, record_type, answers)
+            _store_records(self._cache_ns, domain, record_type, records, answers)
+        except Exception as e:
+            records = self._lookup_failure(domain, record_type, e)
+        return _as_dicts(records)
+
+    async def aget_records(self, domain: str, record_type: str,
+                           lifetime: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Async variant of get_records() backed by dns.asyncresolver.
+        
+        Applies the same validation, limits and error handling, so results
+        are interchangeable with the sync path. Concurrent calls for the same
+        name and type share a single wire query.
+        """
+        key = (domain.lower(), record_type)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return _as_dicts(await asyncio.shield(pending))
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            records = await self._resolve_async(domain, record_type, lifetime)
+            future.set_result(records)
+            return _as_dicts(records)
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.cancel()
+
+    async def _resolve_async(self, domain: str, record_type: str,
+                             lifetime: Optional[float] = None) -> Tuple[Record, ...]:
+        """Validate and resolve one query on the async resolver."""
+        rejected = self._screen_query(domain, record_type)
+        if rejected is not None:
+            return rejected
+        
+        cached = _cached_records(self._cache_ns, domain, record_type)
+        if cached is not None:
+            return cached
+        
+        try:
+            answers = await self._aresolver.resolve(_qname(domain), _rdtype(record_type), lifetime=lifetime,
+                                                    raise_on_no_answer=False)
+            records = self._build_records(domain, record_type, answers)
+            _store_records(self._cache_ns, domain, record_type, records, answers)
+            return records
+        except Exception as e:
+            return self._lookup_failure(domain, record_type, e)
+
+    def _screen_query(self, domain: str, record_type: str) -> Optional[Tuple[Record, ...]]:
+        """Return an error result if the query must not be sent, else None."""
+        # Security: Validate domain (underscore labels allowed for _dmarc, _domainkey, etc.)
+        if not self._is_valid_dns_name(domain):
+            logger.warning(f"Invalid domain format rejected: {domain}")
+            return (Record(type=record_type, error='Invalid domain format'),)
         
         # Security: Block internal/private domains (SSRF protection)
         if self._is_blocked_domain(domain):
-            return [{'error': 'Domain not allowed', 'type': record_type}]
+            return (Record(type=record_type, error='Domain not allowed'),)
         
-        try:
-            answers = self.resolver.resolve(domain, record_type)
-            results = []
-            record_count = 0
-            
-            for rdata in answers:
-                # Security: Enforce record limit (P1-5)
-                record_count += 1
-                if record_count > self.MAX_RECORDS_PER_TYPE:
-                    results.append({
-                        'type': record_type,
-                        'warning': f'Response truncated: more than {self.MAX_RECORDS_PER_TYPE} records returned',
-                        'truncated': True
-                    })
-                    logger.warning(f"DNS response truncated for {domain}/{record_type}: {record_count}+ records")
-                    break
-                
-                value = rdata.to_text()
-                
-                # Handle multi-part TXT records by joining chunks
-                if record_type == 'TXT':
-                    if hasattr(rdata, 'strings'):
-                        value = "".join([
-                            s.decode('utf-8') if isinstance(s, bytes) else s 
-                            for s in rdata.strings
-                        ])
-                    else:
-                        value = value.strip('"')
-
-                record_data = {
-                    'type': record_type,
-                    'host': domain,
-                    'value': value,
-                    'ttl': answers.ttl
-                }
-
-                # Specialized handling for MX priority
-                if record_type == 'MX':
-                    record_data['priority'] = getattr(rdata, 'preference', 0)
-                    record_data['value'] = str(rdata.exchange).rstrip('.')
-
-                results.append(record_data)
-            
-            return results
-            
-        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
-            return []
-        except dns.exception.Timeout:
+        return None
+
+    def _build_records(self, domain: str, record_type: str, answers) -> Tuple[Record, ...]:
+        """Convert a resolver answer into records, enforcing the record limit (P1-5)."""
+        # Everything but the rdata is the same for the whole answer set, so the
+        # type dispatch and TTL read happen once rather than per record
+        if answers.rrset is None:
+            return ()  # NoAnswer: resolve() was called with raise_on_no_answer=False
+        limit = self.MAX_RECORDS_PER_TYPE
+        ttl = answers.ttl
+        rdatas = list(islice(answers, limit + 1))
+        
+        if record_type == 'MX':
+            # Specialized handling for MX priority
+            results = [
+                Record(type=record_type, host=domain, value=str(rdata.exchange).rstrip('.'),
+                       ttl=ttl, priority=getattr(rdata, 'preference', 0))
+                for rdata in rdatas[:limit]
+            ]
+        elif record_type == 'TXT':
+            # Handle multi-part TXT records by joining chunks
+            results = [
+                Record(type=record_type, host=domain, value=_txt_value(rdata), ttl=ttl)
+                for rdata in rdatas[:limit]
+            ]
+        else:
+            results = [
+                Record(type=record_type, host=domain, value=rdata.to_text(), ttl=ttl)
+                for rdata in rdatas[:limit]
+            ]
+        
+        # Security: Enforce record limit (P1-5)
+        if len(rdatas) > limit:
+            results.append(Record(
+                type=record_type,
+                warning=f'Response truncated: more than {limit} records returned',
+                truncated=True
+            ))
+            logger.warning(f"DNS response truncated for {domain}/{record_type}: {limit + 1}+ records")
+        
+        return tuple(results)
+
+    def _lookup_failure(self, domain: str, record_type: str, error: Exception) -> Tuple[Record, ...]:
+        """Map a resolver exception onto the record result shape (P1-8)."""
+        if isinstance(error, (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN)):
+            return ()
+        if isinstance(error, dns.exception.Timeout):
             logger.warning(f"DNS timeout for {domain}/{record_type}")
-            return [{'error': 'DNS lookup timed out', 'type': record_type}]
-        except Exception as e:
-            logger.exception(f"DNS lookup error for {domain}/{record_type}")
-            return [{'error': self._sanitize_error(e), 'type': record_type}]
+            return (Record(type=record_type, error='DNS lookup timed out'),)
+        logger.error(f"DNS lookup error for {domain}/{record_type}", exc_info=error)
+        return (Record(type=record_type, error=self._sanitize_error(error)),)
 
     def resolve_cname_chain(self, domain: str, depth: int = 0) -> Optional[str]:
         """
         Resolve CNAME chain with depth limit (P1-6).
         
-        Prevents infinite loops from circular CNAME references.
+        Walks the chain iteratively and stops on circular CNAME references.
         Returns the final target or None if chain is too deep/broken.
         """
-        if depth >= self.CNAME_DEPTH_LIMIT:
-            logger.warning(f"CNAME chain too deep for {domain} (depth={depth})")
-            return None
-        
-        cname_records = self.get_records(domain, 'CNAME')
-        
-        if not cname_records or cname_records[0].get('error'):
-            return domain  # End of chain
+        seen = set()
+        current = domain
         
-        target = cname_records[0].get('value', '').rstrip('.')
-        if target:
-            return self.resolve_cname_chain(target, depth + 1)
+        while depth < self.CNAME_DEPTH_LIMIT:
+            key = current.lower()
+            if key in seen:
+                logger.warning(f"CNAME loop detected for {domain} at {current}")
+                return None
+            seen.add(key)
+            
+            cname_records = self.get_records(current, 'CNAME')
+            if not cname_records or cname_records[0].get('error'):
+                return current  # End of chain
+            
+            target = cname_records[0].get('value', '').rstrip('.')
+            if not target:
+                return current
+            
+            current = target
+            depth += 1
         
-        return domain
+        logger.warning(f"CNAME chain too deep for {domain} (depth={depth})")
+        return None
 
     def get_whois(self, domain: str) -> Dict[str, Any]:
         """
@@ -245,7 +533,57 @@ class DNSLookup:
         Security Controls:
         - Domain validation (SSRF protection)
         - Error sanitization (P1-8)
+        - Timeout enforcement (WHOIS_TIMEOUT)
         """
+        rejected = self._screen_whois(domain)
+        if rejected is not None:
+            return rejected
+        
+        cached = _cached_whois(domain)
+        if cached is not None:
+            return cached
+        
+        future = self._submit_whois(domain)
+        try:
+            w = future.result(timeout=self.WHOIS_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            return self._whois_timed_out(domain)
+        except Exception as e:
+            return self._whois_failed(domain, e)
+        return self._whois_result(domain, w)
+
+    async def aget_whois(self, domain: str) -> Dict[str, Any]:
+        """Async variant of get_whois(); the blocking lookup runs on the WHOIS pool."""
+        rejected = self._screen_whois(domain)
+        if rejected is not None:
+            return rejected
+        
+        cached = _cached_whois(domain)
+        if cached is not None:
+            return cached
+        
+        try:
+            w = await asyncio.wait_for(
+                asyncio.wrap_future(self._submit_whois(domain)),
+                timeout=self.WHOIS_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            return self._whois_timed_out(domain)
+        except Exception as e:
+            return self._whois_failed(domain, e)
+        return self._whois_result(domain, w)
+
+    def _submit_whois(self, domain: str):
+        """Start a WHOIS lookup on the pool.
+
+        Giving up on the future does not stop a running lookup, so the socket
+        gets the same limit; a hung server cannot hold a pool worker forever.
+        """
+        return _WHOIS_POOL.submit(whois.whois, domain, timeout=max(1, int(self.WHOIS_TIMEOUT)))
+
+    def _screen_whois(self, domain: str) -> Optional[Dict[str, Any]]:
+        """Return an error result if WHOIS must not be queried for domain, else None."""
         # Security: Validate domain
         if not self._is_valid_domain(domain):
             return {'error': 'Invalid domain format', 'registrar': None, 'name_servers': []}
@@ -254,9 +592,11 @@ class DNSLookup:
         if self._is_blocked_domain(domain):
             return {'error': 'Domain not allowed', 'registrar': None, 'name_servers': []}
         
+        return None
+
+    def _whois_result(self, domain: str, w) -> Dict[str, Any]:
+        """Normalize a python-whois response and memoize it."""
         try:
-            w = whois.whois(domain)
-            
             # Normalize registrar (some libraries return a list)
             registrar = w.registrar
             if isinstance(registrar, list):
@@ -271,23 +611,37 @@ class DNSLookup:
             elif isinstance(ns, list):
                 # Ensure all elements are strings and cleaned
                 ns = [str(item) for item in ns if item]
-            
-            return {
-                'registrar': registrar,
-                'name_servers': ns
-            }
         except Exception as e:
-            # Sanitized error message (P1-8)
-            logger.warning(f"WHOIS lookup failed for {domain}: {type(e).__name__}")
-            return {
-                'error': 'WHOIS lookup unavailable',
-                'registrar': None,
-                'name_servers': []
-            }
+            return self._whois_failed(domain, e)
+        
+        result = {
+            'registrar': registrar,
+            'name_servers': ns
+        }
+        _store_whois(domain, {**result, 'name_servers': list(ns)}, self.WHOIS_CACHE_TTL)
+        return result
+
+    def _whois_failed(self, domain: str, error: Exception) -> Dict[str, Any]:
+        # Sanitized error message (P1-8)
+        logger.warning(f"WHOIS lookup failed for {domain}: {type(error).__name__}")
+        return {
+            'error': 'WHOIS lookup unavailable',
+            'registrar': None,
+            'name_servers': []
+        }
+
+    def _whois_timed_out(self, domain: str) -> Dict[str, Any]:
+        logger.warning(f"WHOIS lookup timed out for {domain}")
+        return {
+            'error': 'WHOIS lookup timed out',
+            'registrar': None,
+            'name_servers': []
+        }
 
     # === AUTHORITATIVE LOOKUP METHODS (Phase 3: Trace Functionality) ===
     
-    def get_authoritative_nameservers(self, domain: str) -> List[str]:
+    def get_authoritative_nameservers(self, domain: str,
+                                      lifetime: Optional[float] = None) -> List[str]:
         """
         Find the authoritative nameservers for the domain.
         
@@ -296,6 +650,7 @@ class DNSLookup:
         
         Args:
             domain: Domain to find authoritative NS for
+            lifetime: Total time budget for the NS query; defaults to the resolver's
             
         Returns:
             List of authoritative nameserver hostnames, or empty list on error
@@ -307,9 +662,26 @@ class DNSLookup:
             logger.warning(f"Blocked domain for auth NS lookup: {domain}")
             return []
             
+        entry = _auth_ns_entry(domain)
+        if entry is not None:
+            return list(entry[1])
+            
         try:
-            answers = self.resolver.resolve(domain, 'NS')
-            return [str(r.target).rstrip('.') for r in answers]
+            answers = self.resolver.resolve(_qname(domain), _RDTYPE['NS'], lifetime=lifetime)
+            ns_hostnames = [str(r.target).rstrip('.') for r in answers]
+            if ns_hostnames:
+                # Glue in the additional section saves an A lookup per nameserver
+                ttl = answers.rrset.ttl
+                glue = {}
+                wanted = {name.lower(): name for name in ns_hostnames}
+                for rrset in getattr(answers.response, 'additional', ()):
+                    ns_name = wanted.get(rrset.name.to_text().rstrip('.').lower())
+                    if ns_name is None or rrset.rdtype != dns.rdatatype.A:
+                        continue
+                    glue[ns_name] = rrset[0].address
+                    ttl = min(ttl, rrset.ttl)
+                _store_auth_ns(domain, ttl, ns_hostnames, glue)
+            return ns_hostnames
         except dns.resolver.NXDOMAIN:
             logger.warning(f"Domain does not exist: {domain}")
             return []
@@ -320,7 +692,9 @@ class DNSLookup:
             logger.warning(f"Could not find authoritative NS for {domain}: {self._sanitize_error(e)}")
             return []
 
-    def bypass_cache_lookup(self, domain: str, record_type: str) -> List[Dict[str, Any]]:
+    def bypass_cache_lookup(self, domain: str, record_type: str,
+                            timeout: Optional[float] = None,
+                            lifetime: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Query the authoritative nameservers directly, bypassing public resolver cache.
         
@@ -335,83 +709,136 @@ class DNSLookup:
         Args:
             domain: Domain to query
             record_type: DNS record type (A, CNAME, MX, etc.)
+            timeout: Per-nameserver query timeout for this call (default DEFAULT_TIMEOUT)
+            lifetime: Time budget for the NS and nameserver-address lookups
             
         Returns:
             List of records from authoritative source, with 'source': 'authoritative'
         """
+        return _run_sync(self.abypass_cache_lookup(domain, record_type, timeout, lifetime))
+
+    async def abypass_cache_lookup(self, domain: str, record_type: str,
+                                   timeout: Optional[float] = None,
+                                   lifetime: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Async variant of bypass_cache_lookup().
+        
+        Probes up to three authoritative nameservers concurrently and returns
+        the first answer, so a dead server costs nothing while another replies.
+        """
         # Security validation
         if not self._is_valid_domain(domain):
             return [{"error": "Invalid domain format", "type": record_type, "source": "authoritative"}]
         if self._is_blocked_domain(domain):
             return [{"error": "Domain not allowed", "type": record_type, "source": "authoritative"}]
         
-        auth_ns_list = self.get_authoritative_nameservers(domain)
+        entry = _auth_ns_entry(domain)
+        if entry is None:
+            auth_ns_list = await asyncio.to_thread(self.get_authoritative_nameservers, domain, lifetime)
+            entry = _auth_ns_entry(domain)
+        else:
+            auth_ns_list = list(entry[1])
         if not auth_ns_list:
             return [{"error": "Could not find authoritative nameservers", "type": record_type, "source": "authoritative"}]
 
-        # Create a temporary resolver pointing to the auth NS
-        custom_resolver = dns.resolver.Resolver()
-        custom_resolver.timeout = self.DEFAULT_TIMEOUT
-        custom_resolver.lifetime = self.DEFAULT_LIFETIME
-        
-        # Try each authoritative nameserver until one works
+        candidates = auth_ns_list[:3]  # Try up to 3 nameservers
+        ns_ips = dict(entry[2]) if entry is not None else {}
         last_error = None
-        for auth_ns in auth_ns_list[:3]:  # Try up to 3 nameservers
-            try:
-                # Resolve the IP of the auth NS (we need an IP, not a hostname)
-                ns_ip_answers = self.resolver.resolve(auth_ns, 'A')
-                ns_ip = str(ns_ip_answers[0])
-                custom_resolver.nameservers = [ns_ip]
-                
-                # Now query using this resolver
-                answers = custom_resolver.resolve(domain, record_type)
-                results = []
-                
-                for rdata in answers:
-                    value = rdata.to_text()
-                    
-                    # Handle TXT record formatting
-                    if record_type == 'TXT':
-                        if hasattr(rdata, 'strings'):
-                            value = "".join([
-                                s.decode('utf-8') if isinstance(s, bytes) else s 
-                                for s in rdata.strings
-                            ])
-                        else:
-                            value = value.strip('"')
-                    
-                    record_data = {
-                        'type': record_type,
-                        'host': domain,
-                        'value': value,
-                        'ttl': answers.ttl,
-                        'source': 'authoritative',
-                        'nameserver': auth_ns
-                    }
-                    
-                    # Handle MX priority
-                    if record_type == 'MX':
-                        record_data['priority'] = getattr(rdata, 'preference', 0)
-                        record_data['value'] = str(rdata.exchange).rstrip('.')
-                    
-                    results.append(record_data)
-                
-                return results
-                
-            except dns.resolver.NXDOMAIN:
-                return [{"error": "Domain does not exist", "type": record_type, "source": "authoritative"}]
-            except dns.resolver.NoAnswer:
-                return []  # Record type doesn't exist (not an error)
-            except Exception as e:
-                last_error = e
-                logger.debug(f"Auth lookup via {auth_ns} failed, trying next: {e}")
+        
+        # Resolve the IP of each auth NS not already cached (we need an IP, not a hostname)
+        missing = [auth_ns for auth_ns in candidates if auth_ns not in ns_ips]
+        ns_ip_answers = await asyncio.gather(
+            *(self._aresolver.resolve(_qname(auth_ns), _RDTYPE['A'], lifetime=lifetime) for auth_ns in missing),
+            return_exceptions=True
+        )
+        
+        resolved = {}
+        min_ttl = None
+        for auth_ns, answer in zip(missing, ns_ip_answers):
+            if isinstance(answer, Exception):
+                last_error = answer
+                logger.debug(f"Could not resolve auth NS {auth_ns}: {answer}")
                 continue
+            resolved[auth_ns] = str(answer[0])
+            ttl = answer.rrset.ttl
+            min_ttl = ttl if min_ttl is None else min(min_ttl, ttl)
+        if resolved:
+            _store_auth_ns(domain, min_ttl, auth_ns_list, resolved)
+            ns_ips.update(resolved)
+        
+        # One immutable query shared by every probe; no resolver state involved
+        query = dns.message.make_query(_qname(domain), _rdtype(record_type))
+        tasks = [
+            asyncio.create_task(self._query_authoritative(
+                query, auth_ns, ns_ips[auth_ns], domain, record_type, timeout or self.DEFAULT_TIMEOUT
+            ))
+            for auth_ns in candidates if auth_ns in ns_ips
+        ]
+        
+        # Take the first nameserver that answers; the rest are cancelled
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in tasks:
+                    if task not in done:
+                        continue
+                    if task.exception() is None:
+                        return _as_dicts(task.result())
+                    last_error = task.exception()
+                    logger.debug(f"Auth lookup failed, waiting on remaining nameservers: {last_error}")
+        finally:
+            for task in pending:
+                task.cancel()
         
         # All nameservers failed
         error_msg = self._sanitize_error(last_error) if last_error else "All nameservers failed"
         logger.warning(f"Authoritative lookup failed for {domain}/{record_type}: {error_msg}")
         return [{"error": f"Direct lookup failed: {error_msg}", "type": record_type, "source": "authoritative"}]
 
+    async def _query_authoritative(self, query: dns.message.Message, auth_ns: str, ns_ip: str,
+                                   domain: str, record_type: str, timeout: float) -> Tuple[Record, ...]:
+        """Query one authoritative nameserver; raises if it gives no usable answer."""
+        # Straight to the server over UDP, retrying over TCP if the reply is
+        # truncated. No resolver, so nothing is cached or shared between probes.
+        response, _ = await dns.asyncquery.udp_with_fallback(query, ns_ip, timeout=timeout)
+        
+        rcode = response.rcode()
+        if rcode == dns.rcode.NXDOMAIN:
+            return (Record(type=record_type, error="Domain does not exist", source="authoritative"),)
+        if rcode != dns.rcode.NOERROR:
+            raise dns.exception.DNSException(f"{auth_ns} answered {dns.rcode.to_text(rcode)}")
+        
+        answers = response.resolve_chaining().answer
+        if answers is None:
+            return ()  # Record type doesn't exist (not an error)
+        
+        ttl = answers.ttl
+        is_mx = record_type == 'MX'
+        is_txt = record_type == 'TXT'
+        results = []
+        for rdata in answers:
+            # Handle MX priority
+            if is_mx:
+                value = str(rdata.exchange).rstrip('.')
+                priority = getattr(rdata, 'preference', 0)
+            else:
+                # Handle TXT record formatting
+                value = _txt_value(rdata) if is_txt else rdata.to_text()
+                priority = None
+            
+            results.append(Record(
+                type=record_type,
+                host=domain,
+                value=value,
+                ttl=ttl,
+                priority=priority,
+                source='authoritative',
+                nameserver=auth_ns
+            ))
+        
+        return tuple(results)
+
     def trace_record(self, domain: str, record_type: str) -> Dict[str, Any]:
         """
         Compare cached (public resolver) vs authoritative (direct) DNS records.
@@ -441,29 +868,33 @@ class DNSLookup:
         cached = self.get_records(domain, record_type)
         authoritative = self.bypass_cache_lookup(domain, record_type)
         
-        # Filter out error records for comparison
-        cached_clean = [r for r in cached if not r.get('error')]
-        auth_clean = [r for r in authoritative if not r.get('error')]
+        # Compare values, skipping error records (ignore TTL, source, and
+        # nameserver for matching). The cached pass also tracks the largest
+        # TTL, which estimates the time remaining until caches expire.
+        cached_values = set()
+        ttl_remaining = 0
+        for r in cached:
+            if r.get('error'):
+                continue
+            cached_values.add(r.get('value', '').lower().rstrip('.'))
+            ttl = r.get('ttl', 0)
+            if ttl > ttl_remaining:
+                ttl_remaining = ttl
         
-        # Compare values (ignore TTL, source, and nameserver for matching)
-        cached_values = set(r.get('value', '').lower().rstrip('.') for r in cached_clean)
-        auth_values = set(r.get('value', '').lower().rstrip('.') for r in auth_clean)
+        auth_values = {
+            r.get('value', '').lower().rstrip('.') for r in authoritative if not r.get('error')
+        }
         
         propagated = cached_values == auth_values
         
-        # Estimate TTL remaining (from cached records)
-        ttl_remaining = 0
-        if cached_clean:
-            ttl_remaining = max(r.get('ttl', 0) for r in cached_clean)
-        
         # Build human-readable message
         if propagated:
             message = "✓ Records match - DNS is fully propagated"
-        elif not auth_clean and not cached_clean:
+        elif not auth_values and not cached_values:
             message = "No records found in either source"
-        elif not auth_clean:
+        elif not auth_values:
             message = "Record exists in cache but not at authoritative NS (recently deleted?)"
-        elif not cached_clean:
+        elif not cached_values:
             message = f"Record exists at authoritative NS but not in cache yet (propagating, ~{ttl_remaining}s remaining)"
         else:
             message = f"Records differ - propagation in progress (~{ttl_remaining}s remaining)"
@@ -476,12 +907,37 @@ class DNSLookup:
             "propagated": propagated,
             "ttl_remaining": ttl_remaining,
             "message": message,
-            "cached_values": list(cached_values),
-            "authoritative_values": list(auth_values)
+            "cached_values": sorted(cached_values),
+            "authoritative_values": sorted(auth_values)
         }
 
+    async def _aget_dkim_records(self, dkim_domain: str) -> List[Dict[str, Any]]:
+        """
+        Look up one DKIM selector, returning only usable (non-error) records.
+        
+        TXT and CNAME are queried together. A CNAME means the key is delegated
+        to the provider and the TXT answer would only repeat what sits behind
+        it, so the TXT query is cancelled as soon as a CNAME is found.
+        """
+        txt_task = asyncio.create_task(self.aget_records(dkim_domain, 'TXT'))
+        cname_task = asyncio.create_task(self.aget_records(dkim_domain, 'CNAME'))
+        try:
+            for task in (cname_task, txt_task):
+                records = await task
+                if records and not records[0].get('error'):
+                    return records
+            return []
+        finally:
+            txt_task.cancel()
+            cname_task.cancel()
+
     def get_all_records(self, domain: str, check_www: bool = True, 
                         filter_sections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Synchronous wrapper around aget_all_records() for existing callers."""
+        return _run_sync(self.aget_all_records(domain, check_www, filter_sections))
+
+    async def aget_all_records(self, domain: str, check_www: bool = True, 
+                               filter_sections: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Retrieves DNS records for the domain with full security controls.
         
@@ -506,65 +962,182 @@ class DNSLookup:
         
         # Map logical sections to record types
         mapping = {
-            'web': ['A', 'AAAA', 'CNAME', 'NS'],  # AAAA for IPv6 detection
+            'web': ['A', 'AAAA', 'CNAME', 'NS', 'WHOIS'],  # AAAA for IPv6 detection
             'email': ['MX', 'TXT', 'DMARC', 'DKIM'],
             'SPF': ['TXT']
         }
         
-        requested_types = []
-        if filter_sections:
-            if 'all' in filter_sections:
-                requested_types = all_types + ['DMARC', 'DKIM']
-            else:
-                for s in filter_sections:
-                    if s in mapping:
-                        requested_types.extend(mapping[s])
-                    else:
-                        requested_types.append(s)
-            requested_types = list(set(requested_types))
+        if filter_sections and 'all' not in filter_sections:
+            requested_types = set()
+            for s in filter_sections:
+                if s in mapping:
+                    requested_types.update(mapping[s])
+                else:
+                    requested_types.add(s)
         else:
-            requested_types = all_types + ['DMARC', 'DKIM']
+            requested_types = {*all_types, 'DMARC', 'DKIM', 'WHOIS'}
+        is_web_requested = not requested_types.isdisjoint(('A', 'AAAA', 'CNAME'))
+        # WHOIS is the slowest lookup and only feeds the registrar and
+        # nameserver checks, so email-only or single-record runs skip it
+        is_whois_requested = not requested_types.isdisjoint(('WHOIS', 'NS'))
 
-        # WHOIS lookup
-        results['WHOIS'] = self.get_whois(domain)
+        # Collect every independent query up front so they can run concurrently
+        queries = []  # (result_key, query_name, record_type)
 
         # Root lookups
         for t in all_types:
             if t in requested_types:
-                records = self.get_records(domain, t)
-                results[t] = records
+                queries.append((t, domain, t))
 
         # www lookup (if applicable and web-related)
-        if check_www and not domain.startswith('www.'):
-            is_web_requested = any(t in requested_types for t in ['A', 'AAAA', 'CNAME'])
-            if is_web_requested:
-                www_domain = f"www.{domain}"
-                www_records = self.get_records(www_domain, 'CNAME')
-                www_a_records = self.get_records(www_domain, 'A')
-                www_aaaa_records = self.get_records(www_domain, 'AAAA')  # IPv6
-                
-                results['WWW_CNAME'] = www_records
-                results['WWW_A'] = www_a_records
-                results['WWW_AAAA'] = www_aaaa_records  # IPv6
+        if check_www and is_web_requested and not domain.startswith('www.'):
+            www_domain = f"www.{domain}"
+            queries.append(('WWW_CNAME', www_domain, 'CNAME'))
+            queries.append(('WWW_A', www_domain, 'A'))
+            queries.append(('WWW_AAAA', www_domain, 'AAAA'))  # IPv6
 
         # DMARC lookup
         if 'DMARC' in requested_types:
-            dmarc_domain = f"_dmarc.{domain}"
-            dmarc_records = self.get_records(dmarc_domain, 'TXT')
-            results['DMARC'] = dmarc_records
+            queries.append(('DMARC', f"_dmarc.{domain}", 'TXT'))
+
+        # DKIM lookup (one fused TXT/CNAME probe per selector)
+        dkim_domains = []
+        if 'DKIM' in requested_types:
+            dkim_domains = [suffix + domain for suffix in self._DKIM_SUFFIXES]
+
+        # Lookups are network-bound, so overlapping them makes wall time
+        # roughly the slowest single query instead of the sum of all of them.
+        # WHOIS has no async client, so it runs on a worker thread alongside.
+        whois_tasks = (self.aget_whois(domain),) if is_whois_requested else ()
+        gathered = await asyncio.gather(
+            *whois_tasks,
+            *(self.aget_records(name, rtype) for _, name, rtype in queries),
+            *(self._aget_dkim_records(name) for name in dkim_domains),
+            return_exceptions=True
+        )
+
+        if is_whois_requested:
+            whois_result = gathered[0]
+            if isinstance(whois_result, BaseException):
+                whois_result = {'error': 'WHOIS lookup unavailable', 'registrar': None, 'name_servers': []}
+            results['WHOIS'] = whois_result
+
+        offset = len(whois_tasks)
+        for (key, _, rtype), records in zip(queries, gathered[offset:]):
+            if isinstance(records, BaseException):
+                records = [{'error': self._sanitize_error(records), 'type': rtype}]
+            results[key] = records
 
-        # DKIM lookup
         if 'DKIM' in requested_types:
             dkim_records = []
-            for selector in self.STANDARD_DKIM_SELECTORS:
-                dkim_domain = f"{selector}._domainkey.{domain}"
-                dkim_txt = self.get_records(dkim_domain, 'TXT')
-                if dkim_txt and not dkim_txt[0].get('error'):
-                    dkim_records.extend(dkim_txt)
-                dkim_cname = self.get_records(dkim_domain, 'CNAME')
-                if dkim_cname and not dkim_cname[0].get('error'):
-                    dkim_records.extend(dkim_cname)
-            
+            for records in gathered[offset + len(queries):]:
+                if not isinstance(records, BaseException):
+                    dkim_records.extend(records)
             results['DKIM'] = dkim_records
 
         return results
+
+
+# === MEMOIZED VALIDATION ===
+# Validation and block decisions depend only on the name and class constants,
+# so each distinct name is checked once per process.
+
+def _split_blocked_patterns(patterns: List[str]):
+    """Turn anchored literal patterns into str checks; the rest become one regex.
+
+    Returns (exact names, prefixes, suffixes, combined regex or None).
+    """
+    exact, prefixes, suffixes, rest = set(), [], [], []
+    for p in patterns:
+        at_start, at_end = p.startswith('^'), p.endswith('$')
+        body = p[1 if at_start else 0:len(p) - 1 if at_end else len(p)]
+        literal = re.sub(r'\\(.)', r'\1', body)
+        if re.escape(literal) != body:
+            rest.append(p)
+        elif at_start and at_end:
+            exact.add(literal.lower())
+        elif at_start:
+            prefixes.append(literal.lower())
+        elif at_end:
+            suffixes.append(literal.lower())
+        else:
+            rest.append(p)
+    combined = re.compile('|'.join(f'(?:{p})' for p in rest), re.IGNORECASE) if rest else None
+    return frozenset(exact), tuple(prefixes), tuple(suffixes), combined
+
+
+# str.startswith/endswith with a tuple runs in C, so only the genuinely
+# regular patterns (e.g. the 172.16/12 range) are left for the regex engine
+_BLOCKED_EXACT, _BLOCKED_PREFIXES, _BLOCKED_SUFFIXES, _BLOCKED_RE = \
+    _split_blocked_patterns(DNSLookup.BLOCKED_DOMAIN_PATTERNS)
+
+
+def _name_matches(domain: str, allow_underscore: bool = False) -> bool:
+    """
+    Linear, per-label equivalent of _DOMAIN_RE for a non-empty name.
+
+    At least one host label plus an alphabetic TLD of 2+ chars. Host labels
+    are 1-63 ASCII letters, digits or hyphens, starting and ending with a
+    letter or digit; with allow_underscore they may also carry one leading
+    underscore (_dmarc, _domainkey, etc.).
+    """
+    if len(domain) > DNSLookup.MAX_DOMAIN_LENGTH:
+        return False
+
+    *labels, tld = domain.split('.')
+    if not labels or len(tld) < 2 or not (tld.isascii() and tld.isalpha()):
+        return False
+    for label in labels:
+        if not 0 < len(label) <= 63:
+            return False
+        if allow_underscore and label[0] == '_':
+            label = label[1:]
+            if not label:
+                return False
+        # isalnum() accepts non-ASCII letters and digits, hence isascii()
+        if not (label.isascii() and label[0].isalnum() and label[-1].isalnum()
+                and label.replace('-', '').isalnum()):
+            return False
+
+    return True
+
+
+@lru_cache(maxsize=4096)
+def _domain_is_valid(domain: str) -> bool:
+    """Memoized core of DNSLookup._is_valid_domain for a non-empty string."""
+    return _name_matches(domain)
+
+
+@lru_cache(maxsize=4096)
+def _dns_name_is_valid(domain: str) -> bool:
+    """Memoized core of DNSLookup._is_valid_dns_name for a non-empty string."""
+    return _name_matches(domain, allow_underscore=True)
+
+
+@lru_cache(maxsize=4096)
+def _domain_is_blocked(domain: str) -> bool:
+    """Memoized core of DNSLookup._is_blocked_domain.
+
+    Keyed by the raw name, so a repeated check skips the lower()/strip()
+    copies as well as the pattern tests.
+    """
+    domain_lower = domain.lower().strip()
+
+    # IP literals: let ipaddress classify every non-public range, including
+    # ones the prefix patterns miss (IPv4-mapped IPv6, multicast, reserved)
+    try:
+        addr = ipaddress.ip_address(domain_lower)
+    except ValueError:
+        pass
+    else:
+        if getattr(addr, 'ipv4_mapped', None) is not None:
+            addr = addr.ipv4_mapped
+        if (addr.is_private or addr.is_loopback or addr.is_link_local
+                or addr.is_multicast or addr.is_reserved or addr.is_unspecified):
+            return True
+    return (
+        domain_lower in _BLOCKED_EXACT
+        or domain_lower.startswith(_BLOCKED_PREFIXES)
+        or domain_lower.endswith(_BLOCKED_SUFFIXES)
+        or (_BLOCKED_RE is not None and _BLOCKED_RE.search(domain_lower) is not None)
+    )
@@ -1,23 +1,62 @@
+def _mx_index(providers):
+    """
+    Map each normalized MX pattern (a hostname) to (rank, key, display name).
+    
+    rank is the provider's position in the rules; when two providers list
+    the same pattern the earlier one keeps it.
+    """
+    index = {}
+    rank = 0
+    for key, provider in providers.items():
+        if key == 'unknown':
+            continue
+        for pattern in provider.get('mx_patterns') or []:
+            index.setdefault(pattern.lower().rstrip('.'), (rank, key, provider['display_name']))
+        rank += 1
+    return index
+
+
 class EmailDetector:
     def __init__(self, email_rules):
         self.rules = email_rules
+        self._mx_index = _mx_index(email_rules.get('email_providers', {}))
+        # Cheap C-level prefilter: hosts that end in no pattern skip the walk
+        self._mx_suffixes = tuple(self._mx_index)
 
     def detect_provider(self, mx_records):
-        if not mx_records:
+        # Normalize every usable record to a bare host in one pass: drop a
+        # leading priority ("10 aspmx.l.google.com.") and the root dot, and
+        # skip the value-less {'error': ...} record of a failed lookup
+        hosts = [
+            r['value'].rpartition(' ')[2].rstrip('.').lower()
+            for r in mx_records if 'error' not in r
+        ]
+        if not hosts:
             return {'has_mx': False, 'provider': None, 'display_name': 'None Detected'}
 
-        mx_values = [r['value'].lower() for r in mx_records]
-        
-        # Check against fingerprints
-        providers = self.rules.get('email_providers', {})
-        for key, provider in providers.items():
-            if key == 'unknown': continue
-            
-            for pattern in provider.get('mx_patterns', []):
-                pattern_lower = pattern.lower()
-                for mx in mx_values:
-                    if pattern_lower in mx:
-                        return {'has_mx': True, 'provider': key, 'display_name': provider['display_name']}
+        # A pattern matches an MX host that equals it or ends in '.' + pattern,
+        # so each host costs at most one dict probe per label suffix; the
+        # longest matching suffix decides the host's provider, and across all
+        # MX records the earliest provider in rule order wins.
+        index = self._mx_index
+        suffixes = self._mx_suffixes
+        best = None
+        for host in hosts:
+            if not host.endswith(suffixes):
+                continue
+            start = 0
+            while True:
+                hit = index.get(host[start:])
+                if hit is not None:
+                    if best is None or hit[0] < best[0]:
+                        best = hit
+                    break
+                dot = host.find('.', start)
+                if dot < 0:
+                    break
+                start = dot + 1
+        if best is not None:
+            return {'has_mx': True, 'provider': best[1], 'display_name': best[2]}
 
         return {'has_mx': True, 'provider': 'unknown', 'display_name': 'Unknown Provider'}
 
@@ -31,12 +70,17 @@ class EmailDetector:
         
         spf_id = self.rules.get('spf_identifier', 'v=spf1')
 
+        # Both tags must open the record (RFC 7208 / RFC 6376); the first SPF
+        # record wins, since a second one is a configuration error anyway
         for r in txt_records:
+            if 'error' in r:
+                continue
             val = r['value']
-            if spf_id in val:
-                data['has_spf'] = True
-                data['spf_record'] = val
-            if "v=DKIM1" in val:
+            if val.startswith(spf_id):
+                if not data['has_spf']:
+                    data['has_spf'] = True
+                    data['spf_record'] = val
+            elif val.startswith('v=DKIM1'):
                 data['has_dkim'] = True
                 data['dkim_record'] = val
                 
@@ -70,28 +114,62 @@ class EmailDetector:
         return data
 
     def analyze_dns_snapshot(self, dns_snapshot):
+        txt_dmarc = next(
+            (r['value'] for r in dns_snapshot.get('TXT', []) if r.get('value', '').startswith('v=DMARC1')),
+            None
+        )
+        return self._analyze_dmarc(dns_snapshot.get('DMARC', []), txt_dmarc)
+
+    def analyze_email(self, dns_snapshot):
+        """
+        Full email state for a DNS snapshot.
+        
+        Same result as detect_provider() updated with analyze_txt_records(),
+        analyze_dns_snapshot() and analyze_dkim(), but the root TXT list is
+        scanned once for SPF, DKIM and the DMARC fallback.
+        """
+        data = self.detect_provider(dns_snapshot.get('MX', []))
+        data.update(has_spf=False, spf_record=None, has_dmarc=False, dmarc_record=None)
+        
+        spf_id = self.rules.get('spf_identifier', 'v=spf1')
+        txt_dmarc = None
+
+        for r in dns_snapshot.get('TXT', []):
+            val = r.get('value')
+            if not val:
+                continue
+            if val.startswith(spf_id):
+                if not data['has_spf']:
+                    data['has_spf'] = True
+                    data['spf_record'] = val
+            elif val.startswith('v=DMARC1'):
+                if txt_dmarc is None:
+                    txt_dmarc = val
+            elif val.startswith('v=DKIM1'):
+                data['has_dkim'] = True
+                data['dkim_record'] = val
+
+        data.update(self._analyze_dmarc(dns_snapshot.get('DMARC', []), txt_dmarc))
+        data.update(self.analyze_dkim(dns_snapshot.get('DKIM', [])))
+        return data
+
+    def _analyze_dmarc(self, dmarc_records, txt_dmarc):
+        """DMARC flags from the _dmarc lookup, else from a root TXT fallback value."""
         data = {'has_dmarc': False, 'dmarc_policy': None, 'dmarc_record': None}
         
-        dmarc_records = dns_snapshot.get('DMARC', [])
-        if dmarc_records and len(dmarc_records) > 0:
-            for record in dmarc_records:
-                if 'error' not in record:
-                    data['has_dmarc'] = True
-                    value = record.get('value', '')
-                    data['dmarc_record'] = value
-                    policy = self._extract_dmarc_policy(value)
-                    if policy:
-                        data['dmarc_policy'] = policy
-                    break
+        for record in dmarc_records:
+            if 'error' not in record:
+                value = record.get('value', '')
+                data['has_dmarc'] = True
+                data['dmarc_record'] = value
+                data['dmarc_policy'] = self._extract_dmarc_policy(value)
+                return data
         
-        # Fallback: check TXT records on root if DMARC lookup failed or didn't find anything
-        if not data['has_dmarc']:
-            for r in dns_snapshot.get('TXT', []):
-                if r.get('value', '').startswith('v=DMARC1'):
-                    data['has_dmarc'] = True
-                    data['dmarc_record'] = r.get('value')
-                    data['dmarc_policy'] = self._extract_dmarc_policy(r.get('value'))
-                    break
+        # Fallback: root TXT if the DMARC lookup failed or didn't find anything
+        if txt_dmarc is not None:
+            data['has_dmarc'] = True
+            data['dmarc_record'] = txt_dmarc
+            data['dmarc_policy'] = self._extract_dmarc_policy(txt_dmarc)
 
         return data
     
@@ -108,10 +186,15 @@ class EmailDetector:
         if not dmarc_value:
             return None
         
-        parts = dmarc_value.split(';')
-        for part in parts:
-            part = part.strip()
-            if part.startswith('p='):
-                return part.split('=')[1].strip()
+        # Scan for a 'p=' that opens a tag (only whitespace back to the
+        # previous ';'), then take its value up to the next ';' or '='
+        i = dmarc_value.find('p=')
+        while i >= 0:
+            tag_start = dmarc_value.rfind(';', 0, i) + 1
+            if tag_start == i or dmarc_value[tag_start:i].isspace():
+                end = dmarc_value.find(';', i + 2)
+                value = dmarc_value[i + 2:end] if end >= 0 else dmarc_value[i + 2:]
+                return value.partition('=')[0].strip()
+            i = dmarc_value.find('p=', i + 2)
         
         return None
@@ -13,9 +13,66 @@ from logic.decision_engine import DecisionEngine
 from logic.action_plan_builder import ActionPlanBuilder
 from logic.ai_translator import AITranslator
 
+# Plans with full DNS snapshots run to tens of KB; orjson serializes them much
+# faster than the stdlib, which stays as the fallback
+try:
+    import orjson
+
+    def _dumps(data, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option).decode()
+except ImportError:
+    def _dumps(data, indent=False):
+        return json.dumps(data, indent=2 if indent else None)
+
+def _read_domains(args):
+    """Domains for --batch: one per line from --domains-file or stdin, blanks skipped."""
+    if args.domains_file:
+        with open(args.domains_file, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    else:
+        lines = sys.stdin.read().splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+def _analyze(domain, args, config, dns_tool, email_tool, decision_engine, builder):
+    """Run the DNS -> email -> decision -> plan pipeline for one domain."""
+    # 2. DNS Lookup
+    print(f"Analyzing {domain}...", file=sys.stderr)
+    snapshot = dns_tool.get_all_records(domain, filter_sections=args.sections)
+
+    # 3. Email Detection
+    # If root, we use the root TXT. If subdomain, maybe different?
+    # Email is usually bound to root. If checking subdomain, should we check root MX?
+    # Spec says "Normalize DNS results into a consistent schema".
+    # And "Email ... detection only".
+    # Usually we check root for email even if setting up subdomain?
+    # We will assume what we queried is what we analyze for now.
+    
+    # Provider, SPF, DMARC and DKIM flags in one pass over the snapshot
+    email_state = email_tool.analyze_email(snapshot)
+
+    # 4. Decision Engine
+    intent = {
+        "has_external_dependencies": args.has_external_dependencies,
+        "email_managed_by_platform": args.email_managed_by_platform,
+        "email_provided_by_platform": args.email_provided_by_platform,
+        "email_choice": args.email_choice,
+        "comfortable_editing_dns": args.comfortable_editing_dns,
+        "registrar_known": args.registrar_known,
+        "delegate_dns_management": args.delegate_dns_management,
+        "queried_sections": args.sections
+    }
+    
+    decision = decision_engine.evaluate(domain, args.platform, intent, email_state, snapshot)
+
+    # 5. Action Plan
+    return builder.build_plan(decision, snapshot, email_state)
+
+
 def main():
     parser = argparse.ArgumentParser(description="DNS Diagnostic Tool (Phase 2)")
-    parser.add_argument("--domain", required=True, help="Domain to analyze")
+    parser.add_argument("--domain", help="Domain to analyze")
     parser.add_argument("--platform", required=True, choices=['attractwell', 'aw', 'getoiling', 'go'], help="Target platform")
     
     # Intent flags
@@ -33,7 +90,13 @@ def main():
     
     parser.add_argument("--sections", nargs="+", help="Specific DNS sections or records to check (e.g. web, email, A, MX)")
 
+    # Batch mode: many domains in one process, one JSON result per line (NDJSON)
+    parser.add_argument("--batch", action="store_true", help="Analyze domains read one per line from stdin (or --domains-file)")
+    parser.add_argument("--domains-file", help="File with one domain per line for --batch")
+
     args = parser.parse_args()
+    if not args.batch and not args.domain:
+        parser.error("--domain is required unless --batch is given")
 
     # 1. Load Config
     try:
@@ -42,56 +105,20 @@ def main():
         print(json.dumps({"error": f"Failed to load config: {str(e)}"}))
         sys.exit(1)
 
-    # 2. DNS Lookup
-    dns_tool = DNSLookup()
-    print(f"Analyzing {args.domain}...", file=sys.stderr)
-    snapshot = dns_tool.get_all_records(args.domain, filter_sections=args.sections)
+    # The pipeline objects are built once and shared by every domain analyzed
+    tools = (
+        config,
+        DNSLookup(),
+        EmailDetector(config.get_email_rules()),
+        DecisionEngine(config),
+        ActionPlanBuilder(config)
+    )
 
-    # 3. Email Detection
-    email_tool = EmailDetector(config.get_email_rules())
-    mx_records = snapshot.get('MX', [])
-    txt_records = snapshot.get('TXT', [])
-    
-    # If root, we use the root TXT. If subdomain, maybe different?
-    # Email is usually bound to root. If checking subdomain, should we check root MX?
-    # Spec says "Normalize DNS results into a consistent schema".
-    # And "Email ... detection only".
-    # Usually we check root for email even if setting up subdomain?
-    # We will assume what we queried is what we analyze for now.
-    
-    email_state = email_tool.detect_provider(mx_records)
-    # Enhance specific flags
-    txt_analysis = email_tool.analyze_txt_records(txt_records)
-    email_state.update(txt_analysis)
-    
-    # Analyze DMARC from dns_snapshot
-    dmarc_analysis = email_tool.analyze_dns_snapshot(snapshot)
-    email_state.update(dmarc_analysis)
+    if args.batch:
+        _run_batch(args, tools)
+        return
 
-    # Analyze DKIM from dns_snapshot
-    dkim_records = snapshot.get('DKIM', [])
-    dkim_analysis = email_tool.analyze_dkim(dkim_records)
-    email_state.update(dkim_analysis)
-
-    # 4. Decision Engine
-    decision_engine = DecisionEngine(config)
-    
-    intent = {
-        "has_external_dependencies": args.has_external_dependencies,
-        "email_managed_by_platform": args.email_managed_by_platform,
-        "email_provided_by_platform": args.email_provided_by_platform,
-        "email_choice": args.email_choice,
-        "comfortable_editing_dns": args.comfortable_editing_dns,
-        "registrar_known": args.registrar_known,
-        "delegate_dns_management": args.delegate_dns_management,
-        "queried_sections": args.sections
-    }
-    
-    decision = decision_engine.evaluate(args.domain, args.platform, intent, email_state, snapshot)
-
-    # 5. Action Plan
-    builder = ActionPlanBuilder(config)
-    final_plan = builder.build_plan(decision, snapshot, email_state)
+    final_plan = _analyze(args.domain, args, *tools)
 
     # 6. AI Translation (Optional - Phase 2)
     if args.ai:
@@ -111,7 +138,46 @@ def main():
             final_plan["ai_insights"] = {"error": str(e)}
 
     # Output JSON
-    print(json.dumps(final_plan, indent=2))
+    print(_dumps(final_plan, indent=True))
+
+
+def _run_batch(args, tools):
+    """Analyze every --batch domain with shared tools and print NDJSON."""
+    try:
+        domains = _read_domains(args)
+    except OSError as e:
+        print(json.dumps({"error": f"Failed to read domains: {str(e)}"}))
+        sys.exit(1)
+
+    results = []  # (plan, analyzed) in input order
+    for domain in domains:
+        try:
+            results.append((_analyze(domain, args, *tools), True))
+        except Exception as e:
+            results.append(({"domain": domain, "error": str(e)}, False))
+        if not args.ai:
+            # Without AI each result can stream out as soon as it is ready
+            print(_dumps(results.pop()[0]), flush=True)
+
+    if not args.ai:
+        return
+
+    plans = [plan for plan, analyzed in results if analyzed]
+    print(f"Generating AI insights for {len(plans)} domains (audience: {args.ai_audience})...", file=sys.stderr)
+    try:
+        translator = AITranslator()
+        if args.ai_audience == 'both':
+            insights = [translator.translate_both(plan) for plan in plans]
+        else:
+            # Batched translation: several plans per API request
+            insights = translator.translate_many(plans, audience=args.ai_audience)
+    except Exception as e:
+        insights = [{"error": str(e)} for _ in plans]
+
+    for plan, ai_insights in zip(plans, insights):
+        plan["ai_insights"] = ai_insights
+    for plan, _ in results:
+        print(_dumps(plan))
 
 if __name__ == "__main__":
     main()
@@ -1,228 +1,378 @@
 import unittest
+import asyncio
 import json
 import os
+import tempfile
+import time
+from types import MappingProxyType
+from unittest import mock
 import sys
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+import dns.message
+import dns.rdata
+import dns.rdataclass
+import dns.rdatatype
+import dns.resolver
 
-from config_loader import ConfigLoader
+# Add logic to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../logic'))
+
+from config_loader import ConfigLoader, build_rules_cache
 from email_detector import EmailDetector
 from decision_engine import DecisionEngine
+from dns_lookup import DNSLookup
+
+# Shared read-only empty input: a test fails loudly if the code under test
+# tries to mutate a snapshot or intent it was handed
+_EMPTY = MappingProxyType({})
+
+# Root-domain decision cases. The registrar is known and the user is
+# comfortable editing DNS in all of them; warning_text lists substrings that
+# must all appear in one warning.
+_DECISION_CASES = (
+    {
+        "label": "no external dependencies",
+        "has_external_dependencies": False,
+        "email_state": {"has_mx": False},
+        "option": 'option_1',
+        "warning_code": None,
+        "warning_text": (),
+    },
+    {
+        "label": "external dependencies",
+        "has_external_dependencies": True,
+        "email_state": {"has_mx": True, "provider": "google_workspace"},
+        "option": 'option_2',
+        "warning_code": None,
+        "warning_text": (),
+    },
+    {
+        # Even though the user says no external dependencies, MX records were
+        # detected: record-level keeps email working
+        "label": "mx overrides to option_2",
+        "has_external_dependencies": False,
+        "email_state": {"has_mx": True, "provider": "unknown"},
+        "option": 'option_2',
+        "warning_code": 'CUSTOM_EMAIL_DETECTED',
+        "warning_text": ("Custom email address detected",),
+    },
+    {
+        # DMARC with a reject policy but no MX is a defensive setup
+        "label": "strict dmarc without mx",
+        "has_external_dependencies": False,
+        "email_state": {
+            "has_mx": False,
+            "has_dmarc": True,
+            "dmarc_policy": "reject",
+            "provider": None
+        },
+        "option": 'option_1',
+        "warning_code": 'STRICT_DMARC_WITHOUT_MX',
+        "warning_text": ("p=reject", "no MX records"),
+    },
+)
+
+def _answer(name, record_type, *values, ttl=300):
+    """A resolver Answer for name/record_type holding values; none is a NoAnswer."""
+    query = dns.message.make_query(name, record_type)
+    response = dns.message.make_response(query)
+    qname = query.question[0].name
+    rdtype = dns.rdatatype.from_text(record_type)
+    if values:
+        rrset = response.find_rrset(response.answer, qname, dns.rdataclass.IN, rdtype, create=True)
+        for value in values:
+            rrset.add(dns.rdata.from_text(dns.rdataclass.IN, rdtype, value), ttl)
+    return dns.resolver.Answer(qname, rdtype, dns.rdataclass.IN, response)
+
+def _stub_resolver(lookup, records, ttl=300):
+    """Answer lookup's queries from records {(name, type): (value, ...)}.
+
+    Returns the list of (name, type) queries that reached the stub.
+    """
+    calls = []
+
+    def resolve(qname, rdtype, lifetime=None, raise_on_no_answer=True):
+        name, record_type = qname.to_text().rstrip('.'), dns.rdatatype.to_text(rdtype)
+        calls.append((name, record_type))
+        return _answer(name, record_type, *records.get((name, record_type), ()), ttl=ttl)
+
+    async def aresolve(qname, rdtype, **kwargs):
+        await asyncio.sleep(0)  # let concurrent lookups for the same name overlap
+        return resolve(qname, rdtype, **kwargs)
+
+    lookup.resolver.resolve = resolve
+    lookup._aresolver.resolve = aresolve
+    return calls
 
 class TestCore(unittest.TestCase):
-    def setUp(self):
-        # Load real config for testing real logic
-        self.config = ConfigLoader("domain_rules.yaml")
-        self.email_rules = self.config.get_email_rules()
+    @classmethod
+    def setUpClass(cls):
+        # Load real config for testing real logic; the rules are read-only in
+        # these tests, so one load serves the whole class
+        cls.config = ConfigLoader("domain_rules.yaml")
+        cls.email_rules = cls.config.get_email_rules()
+        # Neither keeps per-call state, so the tests can share one of each
+        cls.detector = EmailDetector(cls.email_rules)
+        cls.engine = DecisionEngine(cls.config)
     
+    def test_config_loader_reuses_parsed_rules(self):
+        other = ConfigLoader("domain_rules.yaml")
+        self.assertIs(other.rules, self.config.rules)
+        self.assertEqual(other.config_path, self.config.config_path)
+
+    def test_config_loader_survives_chdir(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                self.assertIs(ConfigLoader("domain_rules.yaml").rules, self.config.rules)
+            finally:
+                os.chdir(cwd)
+
+    def test_config_loader_reloads_edited_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rules.yaml')
+            with open(path, 'w') as f:
+                f.write("platforms: {}\nversion: 1\n")
+            first = ConfigLoader(path)
+            self.assertIs(ConfigLoader(path).rules, first.rules)
+
+            with open(path, 'w') as f:
+                f.write("platforms: {}\nversion: 22\n")
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(ConfigLoader(path).rules['version'], 22)
+
+    def test_rules_cache_only_from_build_step(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rules.yaml')
+            with open(path, 'w') as f:
+                f.write("platforms: {}\nversion: 1\n")
+            ConfigLoader(path)
+            self.assertEqual(os.listdir(tmp), ['rules.yaml'])
+
+            cache_path = build_rules_cache(path)
+            self.assertTrue(os.path.exists(cache_path))
+
+            # A cache built from other contents is never loaded
+            with open(path, 'w') as f:
+                f.write("platforms: {}\nversion: 22\n")
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(ConfigLoader(path).rules['version'], 22)
+
+    def test_config_loader_normalizes_platform_values(self):
+        self.assertTrue(self.config.rules['_normalized'])
+        target = self.config.rules['platforms']['google_sites']['root_domain']['option_1']['records'][0]['value']
+        self.assertEqual(target, 'ghs.googlehosted.com')
+
     def test_email_provider_google(self):
-        detector = EmailDetector(self.email_rules)
         mx_records = [
             {'value': '10 aspmx.l.google.com.'},
             {'value': '20 alt1.aspmx.l.google.com.'}
         ]
-        result = detector.detect_provider(mx_records)
+        result = self.detector.detect_provider(mx_records)
         self.assertEqual(result['provider'], 'google_workspace')
         self.assertTrue(result['has_mx'])
 
+    def test_email_provider_matches_whole_labels(self):
+        mx_records = [
+            {'value': '10 aspmx.l.google.com.attacker.net.'},
+            {'value': '20 notaspmx.l.google.com.'}
+        ]
+        result = self.detector.detect_provider(mx_records)
+        self.assertEqual(result['provider'], 'unknown')
+
+    def test_email_provider_error_record_means_no_mx(self):
+        mx_records = [
+            {'error': 'DNS lookup timed out', 'type': 'MX'}
+        ]
+        result = self.detector.detect_provider(mx_records)
+        self.assertFalse(result['has_mx'])
+        self.assertIsNone(result['provider'])
+
     def test_email_provider_unknown(self):
-        detector = EmailDetector(self.email_rules)
         mx_records = [
             {'value': '10 mail.random-server.com.'}
         ]
-        result = detector.detect_provider(mx_records)
+        result = self.detector.detect_provider(mx_records)
         self.assertEqual(result['provider'], 'unknown')
         self.assertTrue(result['has_mx'])
 
     def test_dmarc_present(self):
-        detector = EmailDetector(self.email_rules)
         dns_snapshot = {
             'DMARC': [
                 {'type': 'TXT', 'host': '_dmarc.example.com', 'value': 'v=DMARC1; p=none;', 'ttl': 3600}
             ]
         }
-        result = detector.analyze_dns_snapshot(dns_snapshot)
+        result = self.detector.analyze_dns_snapshot(dns_snapshot)
         self.assertTrue(result['has_dmarc'])
 
     def test_dmarc_absent(self):
-        detector = EmailDetector(self.email_rules)
-        dns_snapshot = {}
-        result = detector.analyze_dns_snapshot(dns_snapshot)
+        dns_snapshot = _EMPTY
+        result = self.detector.analyze_dns_snapshot(dns_snapshot)
         self.assertFalse(result['has_dmarc'])
 
     def test_dmarc_multiple_records(self):
-        detector = EmailDetector(self.email_rules)
         dns_snapshot = {
             'DMARC': [
                 {'type': 'TXT', 'host': '_dmarc.example.com', 'value': 'v=DMARC1; p=quarantine;', 'ttl': 3600},
                 {'type': 'TXT', 'host': '_dmarc.example.com', 'value': 'v=DMARC1; p=reject;', 'ttl': 3600}
             ]
         }
-        result = detector.analyze_dns_snapshot(dns_snapshot)
+        result = self.detector.analyze_dns_snapshot(dns_snapshot)
         self.assertTrue(result['has_dmarc'])
 
     def test_dmarc_with_error_record(self):
-        detector = EmailDetector(self.email_rules)
         dns_snapshot = {
             'DMARC': [
                 {'error': 'NXDOMAIN', 'type': 'TXT'}
             ]
         }
-        result = detector.analyze_dns_snapshot(dns_snapshot)
+        result = self.detector.analyze_dns_snapshot(dns_snapshot)
         self.assertFalse(result['has_dmarc'])
 
     def test_dmarc_policy_extraction_reject(self):
-        detector = EmailDetector(self.email_rules)
         dns_snapshot = {
             'DMARC': [
                 {'type': 'TXT', 'host': '_dmarc.example.com', 'value': 'v=DMARC1; p=reject; sp=reject; adkim=s; aspf=s;', 'ttl': 3600}
             ]
         }
-        result = detector.analyze_dns_snapshot(dns_snapshot)
+        result = self.detector.analyze_dns_snapshot(dns_snapshot)
         self.assertTrue(result['has_dmarc'])
         self.assertEqual(result['dmarc_policy'], 'reject')
 
     def test_dmarc_policy_extraction_quarantine(self):
-        detector = EmailDetector(self.email_rules)
         dns_snapshot = {
             'DMARC': [
                 {'type': 'TXT', 'host': '_dmarc.example.com', 'value': 'v=DMARC1; p=quarantine;', 'ttl': 3600}
             ]
         }
-        result = detector.analyze_dns_snapshot(dns_snapshot)
+        result = self.detector.analyze_dns_snapshot(dns_snapshot)
         self.assertTrue(result['has_dmarc'])
         self.assertEqual(result['dmarc_policy'], 'quarantine')
 
     def test_dmarc_policy_extraction_none(self):
-        detector = EmailDetector(self.email_rules)
         dns_snapshot = {
             'DMARC': [
                 {'type': 'TXT', 'host': '_dmarc.example.com', 'value': 'v=DMARC1; p=none;', 'ttl': 3600}
             ]
         }
-        result = detector.analyze_dns_snapshot(dns_snapshot)
+        result = self.detector.analyze_dns_snapshot(dns_snapshot)
         self.assertTrue(result['has_dmarc'])
         self.assertEqual(result['dmarc_policy'], 'none')
     def test_dkim_via_txt(self):
-        detector = EmailDetector(self.email_rules)
         dkim_records = [
             {'type': 'TXT', 'host': 'default._domainkey.example.com', 'value': 'v=DKIM1; k=rsa; p=MIGfMA0B...', 'ttl': 3600}
         ]
-        result = detector.analyze_dkim(dkim_records)
+        result = self.detector.analyze_dkim(dkim_records)
         self.assertTrue(result['has_dkim'])
 
     def test_dkim_via_cname(self):
-        detector = EmailDetector(self.email_rules)
         dkim_records = [
             {'type': 'CNAME', 'host': 'selector1._domainkey.example.com', 'value': 'selector1._domainkey.external-provider.com.', 'ttl': 3600}
         ]
-        result = detector.analyze_dkim(dkim_records)
+        result = self.detector.analyze_dkim(dkim_records)
         self.assertTrue(result['has_dkim'])
 
     def test_dkim_absent(self):
-        detector = EmailDetector(self.email_rules)
         dkim_records = []
-        result = detector.analyze_dkim(dkim_records)
+        result = self.detector.analyze_dkim(dkim_records)
         self.assertFalse(result['has_dkim'])
 
     def test_dkim_absent_with_error_record(self):
-        detector = EmailDetector(self.email_rules)
         dkim_records = [
             {'error': 'NXDOMAIN', 'type': 'TXT'}
         ]
-        result = detector.analyze_dkim(dkim_records)
+        result = self.detector.analyze_dkim(dkim_records)
         self.assertFalse(result['has_dkim'])
 
+    def test_spf_must_open_record_and_first_wins(self):
+        txt_records = [
+            {'type': 'TXT', 'value': 'note: v=spf1 is configured elsewhere'},
+            {'type': 'TXT', 'value': 'v=spf1 include:_spf.google.com ~all'},
+            {'type': 'TXT', 'value': 'v=spf1 -all'}
+        ]
+        result = self.detector.analyze_txt_records(txt_records)
+        self.assertTrue(result['has_spf'])
+        self.assertEqual(result['spf_record'], 'v=spf1 include:_spf.google.com ~all')
 
-    def test_decision_root_no_external(self):
-        engine = DecisionEngine(self.config)
-        intent = {
-            "has_external_dependencies": False,
-            "registrar_known": True,
-            "comfortable_editing_dns": True
+    def test_analyze_email_matches_separate_passes(self):
+        dns_snapshot = {
+            'MX': [{'type': 'MX', 'value': 'aspmx.l.google.com.', 'priority': 1}],
+            'TXT': [
+                {'type': 'TXT', 'value': 'v=spf1 include:_spf.google.com ~all'},
+                {'type': 'TXT', 'value': 'v=DMARC1; p=none;'},
+                {'error': 'DNS lookup timed out', 'type': 'TXT'}
+            ],
+            'DMARC': [{'error': 'NXDOMAIN', 'type': 'TXT'}],
+            'DKIM': [
+                {'type': 'CNAME', 'host': 'selector1._domainkey.example.com', 'value': 'selector1._domainkey.external-provider.com.'}
+            ]
         }
-        email_state = {"has_mx": False}
-        dns_snapshot = {}
-        
-        decision = engine.evaluate("example.com", "attractwell", intent, email_state, dns_snapshot)
-        
-        self.assertFalse(decision['is_subdomain'])
-        self.assertEqual(decision['connection_option'], 'option_1') # Nameserver
-        self.assertFalse(decision['delegate_access']['recommended'])
+        expected = self.detector.detect_provider(dns_snapshot['MX'])
+        expected.update(self.detector.analyze_txt_records(dns_snapshot['TXT']))
+        expected.update(self.detector.analyze_dns_snapshot(dns_snapshot))
+        expected.update(self.detector.analyze_dkim(dns_snapshot['DKIM']))
+        result = self.detector.analyze_email(dns_snapshot)
+        self.assertEqual(result, expected)
+        self.assertTrue(result['has_spf'])
+        self.assertEqual(result['dmarc_policy'], 'none')
 
-    def test_decision_root_with_external(self):
-        engine = DecisionEngine(self.config)
-        intent = {
-            "has_external_dependencies": True,
-            "registrar_known": True,
-            "comfortable_editing_dns": True
-        }
-        email_state = {"has_mx": True, "provider": "google_workspace"}
-        dns_snapshot = {}
-        
-        decision = engine.evaluate("example.com", "attractwell", intent, email_state, dns_snapshot)
-        
-        self.assertEqual(decision['connection_option'], 'option_2') # Record level
 
-    def test_decision_mx_detected_overrides_to_option_2(self):
-        engine = DecisionEngine(self.config)
-        intent = {
-            "has_external_dependencies": False,
-            "registrar_known": True,
-            "comfortable_editing_dns": True
-        }
-        # Even though user says no external dependencies, MX records detected
-        email_state = {"has_mx": True, "provider": "unknown"}
-        dns_snapshot = {}
-        
-        decision = engine.evaluate("example.com", "attractwell", intent, email_state, dns_snapshot)
-        
-        # Should override to option_2 (record-level) to preserve email
-        self.assertEqual(decision['connection_option'], 'option_2')
-        # Should include warning about custom email
-        warning_found = any("Custom email address detected" in w for w in decision['warnings'])
-        self.assertTrue(warning_found, "Should warn about custom email when MX is detected")
-
-    def test_strict_dmarc_without_mx_warning(self):
-        engine = DecisionEngine(self.config)
-        intent = {
-            "has_external_dependencies": False,
-            "registrar_known": True,
-            "comfortable_editing_dns": True
-        }
-        # DMARC with reject policy but no MX
-        email_state = {
-            "has_mx": False,
-            "has_dmarc": True,
-            "dmarc_policy": "reject",
-            "provider": None
-        }
-        dns_snapshot = {}
-        
-        decision = engine.evaluate("example.com", "attractwell", intent, email_state, dns_snapshot)
-        
-        # Should have warning about defensive DMARC
-        warning_found = any("p=reject" in w and "no MX records" in w for w in decision['warnings'])
-        self.assertTrue(warning_found, "Should warn about strict DMARC without MX")
+    def test_decision_root_domain(self):
+        for case in _DECISION_CASES:
+            with self.subTest(case["label"]):
+                intent = {
+                    "has_external_dependencies": case["has_external_dependencies"],
+                    "registrar_known": True,
+                    "comfortable_editing_dns": True
+                }
+
+                decision = self.engine.evaluate("example.com", "attractwell", intent, case["email_state"], _EMPTY)
+
+                self.assertFalse(decision['is_subdomain'])
+                self.assertEqual(decision['connection_option'], case["option"])
+                self.assertFalse(decision['delegate_access']['recommended'])
+                if case["warning_code"] is not None:
+                    self.assertIn(case["warning_code"], decision['warning_codes'])
+                if case["warning_text"]:
+                    self.assertTrue(
+                        any(all(text in w for text in case["warning_text"]) for w in decision['warnings']),
+                        f"No warning contains all of {case['warning_text']}"
+                    )
 
     def test_subdomain_logic(self):
-        engine = DecisionEngine(self.config)
-        intent = {} # logic shouldn't care about intent for subdomains per rules logic
+        intent = _EMPTY # logic shouldn't care about intent for subdomains per rules logic
         email_state = {"has_mx": False}
-        dns_snapshot = {}
+        dns_snapshot = _EMPTY
         
-        decision = engine.evaluate("shop.example.com", "getoiling", intent, email_state, dns_snapshot)
+        decision = self.engine.evaluate("shop.example.com", "getoiling", intent, email_state, dns_snapshot)
         
         self.assertTrue(decision['is_subdomain'])
         self.assertEqual(decision['connection_option'], 'cname_only')
 
+    def test_decision_keeps_dict_access(self):
+        """Decision objects still read like the old dict, minus private fields"""
+        decision = self.engine.evaluate("example.com", "attractwell", _EMPTY, {"has_mx": False}, _EMPTY)
+
+        self.assertEqual(decision['connection_option'], decision.connection_option)
+        self.assertIsNone(decision.get('intent'))
+        self.assertIn('conflicts', decision)
+        self.assertNotIn('snapshot_index', decision)
+        self.assertIsNone(decision.get('snapshot_index'))
+        with self.assertRaises(KeyError):
+            decision['intent']
+        as_dict = decision.to_dict()
+        self.assertEqual(json.loads(json.dumps(as_dict))['warning_codes'], sorted(decision.warning_codes))
+        self.assertNotIn('snapshot_index', as_dict)
+        self.assertEqual(as_dict['domain'], "example.com")
+
     def test_action_plan_with_conflicts(self):
         """Test that action plan detects conflicting A/CNAME records"""
         from action_plan_builder import ActionPlanBuilder
         
         builder = ActionPlanBuilder(self.config)
-        engine = DecisionEngine(self.config)
         
         # Setup: www has both A and CNAME (conflict)
         # Also has MX to force option_2 (record-level changes)
@@ -242,7 +392,7 @@ class TestCore(unittest.TestCase):
         }
         email_state = {"has_mx": True, "provider": "google_workspace"}
         
-        decision = engine.evaluate("example.com", "attractwell", intent, email_state, dns_snapshot)
+        decision = self.engine.evaluate("example.com", "attractwell", intent, email_state, dns_snapshot)
         plan = builder.build_plan(decision, dns_snapshot, email_state)
         
         # Should have conflicts
@@ -258,7 +408,6 @@ class TestCore(unittest.TestCase):
         from action_plan_builder import ActionPlanBuilder
         
         builder = ActionPlanBuilder(self.config)
-        engine = DecisionEngine(self.config)
         
         # Setup: Domain already has correct records
         dns_snapshot = {
@@ -279,7 +428,7 @@ class TestCore(unittest.TestCase):
         }
         email_state = {"has_mx": False}
         
-        decision = engine.evaluate("example.com", "attractwell", intent, email_state, dns_snapshot)
+        decision = self.engine.evaluate("example.com", "attractwell", intent, email_state, dns_snapshot)
         plan = builder.build_plan(decision, dns_snapshot, email_state)
         
         # Should be marked as completed
@@ -291,7 +440,6 @@ class TestCore(unittest.TestCase):
         from action_plan_builder import ActionPlanBuilder
         
         builder = ActionPlanBuilder(self.config)
-        engine = DecisionEngine(self.config)
         
         # Setup: Subdomain with no CNAME
         dns_snapshot = {
@@ -301,10 +449,10 @@ class TestCore(unittest.TestCase):
             'TXT': []
         }
         
-        intent = {}
+        intent = _EMPTY
         email_state = {"has_mx": False}
         
-        decision = engine.evaluate("shop.example.com", "getoiling", intent, email_state, dns_snapshot)
+        decision = self.engine.evaluate("shop.example.com", "getoiling", intent, email_state, dns_snapshot)
         plan = builder.build_plan(decision, dns_snapshot, email_state)
         
         # Should have action to add CNAME
@@ -318,5 +466,89 @@ class TestCore(unittest.TestCase):
         self.assertEqual(cname_action['value'], 'sites.getoiling.com')
 
 
+    def test_record_cache_is_per_nameserver_set(self):
+        default = DNSLookup()
+        custom = DNSLookup(nameservers=['192.0.2.53'])
+        _stub_resolver(default, {('split.example.com', 'A'): ('192.0.2.1',)})
+        _stub_resolver(custom, {('split.example.com', 'A'): ('192.0.2.2',)})
+
+        self.assertEqual(default.get_records('split.example.com', 'A')[0]['value'], '192.0.2.1')
+        self.assertEqual(custom.get_records('split.example.com', 'A')[0]['value'], '192.0.2.2')
+
+    def test_no_answer_is_empty_not_an_error(self):
+        lookup = DNSLookup()
+        _stub_resolver(lookup, {})
+
+        self.assertEqual(lookup.get_records('noanswer.example.com', 'AAAA'), [])
+        self.assertEqual(asyncio.run(lookup.aget_records('noanswer.example.com', 'CNAME')), [])
+
+    def test_aget_all_records_fans_out_each_query_once(self):
+        lookup = DNSLookup()
+        calls = _stub_resolver(lookup, {
+            ('fanout.example.com', 'A'): ('192.0.2.10',),
+            ('fanout.example.com', 'MX'): ('10 mx.fanout.example.com.',),
+            ('fanout.example.com', 'TXT'): ('"v=spf1 -all"',),
+            ('_dmarc.fanout.example.com', 'TXT'): ('"v=DMARC1; p=none"',),
+            ('www.fanout.example.com', 'CNAME'): ('fanout.example.com.',),
+        })
+
+        results = asyncio.run(lookup.aget_all_records('fanout.example.com', filter_sections=['A', 'MX', 'TXT', 'DMARC']))
+
+        self.assertEqual(results['A'][0]['value'], '192.0.2.10')
+        self.assertEqual(results['MX'][0]['priority'], 10)
+        self.assertEqual(results['TXT'][0]['value'], 'v=spf1 -all')
+        self.assertEqual(results['DMARC'][0]['value'], 'v=DMARC1; p=none')
+        self.assertEqual(results['WWW_CNAME'][0]['value'], 'fanout.example.com.')
+        self.assertEqual(results['WWW_A'], [])
+        self.assertNotIn('NS', results)
+        self.assertNotIn('WHOIS', results)
+        self.assertEqual(len(calls), len(set(calls)))
+
+    def test_concurrent_lookups_share_one_query(self):
+        lookup = DNSLookup()
+        # A zero TTL is never cached, so only coalescing can save the second query
+        calls = _stub_resolver(lookup, {('coalesce.example.com', 'A'): ('192.0.2.20',)}, ttl=0)
+
+        async def lookup_twice():
+            return await asyncio.gather(
+                lookup.aget_records('coalesce.example.com', 'A'),
+                lookup.aget_records('coalesce.example.com', 'A'),
+            )
+
+        first, second = asyncio.run(lookup_twice())
+        self.assertEqual(first, second)
+        self.assertEqual(calls, [('coalesce.example.com', 'A')])
+
+        asyncio.run(lookup.aget_records('coalesce.example.com', 'A'))
+        self.assertEqual(len(calls), 2)
+
+    def test_record_cache_expires_with_the_answer_ttl(self):
+        lookup = DNSLookup()
+        calls = _stub_resolver(lookup, {('expiry.example.com', 'A'): ('192.0.2.30',)}, ttl=60)
+
+        lookup.get_records('expiry.example.com', 'A')
+        lookup.get_records('expiry.example.com', 'A')
+        self.assertEqual(len(calls), 1)
+
+        later = time.monotonic() + 61
+        with mock.patch('time.monotonic', return_value=later):
+            lookup.get_records('expiry.example.com', 'A')
+        self.assertEqual(len(calls), 2)
+
+    def test_dkim_prefers_cname_delegation(self):
+        lookup = DNSLookup()
+        _stub_resolver(lookup, {
+            ('google._domainkey.dkim.example.com', 'CNAME'): ('google._domainkey.provider.example.net.',),
+            ('google._domainkey.dkim.example.com', 'TXT'): ('"v=DKIM1; p=abc"',),
+            ('selector1._domainkey.dkim.example.com', 'TXT'): ('"v=DKIM1; p=def"',),
+        })
+
+        results = asyncio.run(lookup.aget_all_records('dkim.example.com', filter_sections=['DKIM']))
+
+        by_host = {r['host']: r for r in results['DKIM']}
+        self.assertEqual(len(results['DKIM']), 2)
+        self.assertEqual(by_host['google._domainkey.dkim.example.com']['type'], 'CNAME')
+        self.assertEqual(by_host['selector1._domainkey.dkim.example.com']['type'], 'TXT')
+
 if __name__ == '__main__':
     unittest.main()